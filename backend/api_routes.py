@@ -1,41 +1,93 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
+from fastapi.responses import StreamingResponse
 from typing import Union
 from datetime import datetime
 import asyncio
+import json
 
 from models import (
     ChatMessage, ChatResponse, ConsultationNoteRequest, MemoryUpdateRequest,
-    APIResponse, PatientBriefResponse, RecentPatientsResponse, PatientProfile
+    MemoryBatchRequest, APIResponse, PatientBriefResponse, RecentPatientsResponse, PatientProfile,
+    PatientSearchResponse, PatientRecordsResponse, BriefWarmRequest
 )
 from medical_tools import (
-    get_patient_brief, add_consultation_notes, list_recent_patients, update_patient_memory
+    get_patient_brief, add_consultation_notes, list_recent_patients, update_patient_memory,
+    record_patient_visit, search_patients, patient_resolver, get_patient_records,
+    build_patient_brief, brief_cache
 )
-from medical_agent import call_medical_agent, initialize_session
+from medical_agent import (
+    call_medical_agent, stream_medical_agent, session_registry, narrative_prompt, NO_RESPONSE,
+    narrative_session, NARRATIVE_USER_ID
+)
+from async_memory import async_patient_memory
+from brief_warmer import brief_warmer
+from llm_scheduler import llm_scheduler, is_rate_limited
 
 router = APIRouter()
 
-# Global identifiers for AI agent
-DOCTOR_ID = "WebDoctor"
-SESSION_ID = "web_session"
+# Doctor the AI agent talks to when a request has no X-Doctor-Id header
+DEFAULT_DOCTOR_ID = "WebDoctor"
+
+RATE_LIMIT_MESSAGE = "I'm currently experiencing high demand (API rate limit reached). The system is working perfectly - you've just used up today's free API quota! You can wait for the limit to reset, upgrade your Google AI plan, or try again tomorrow. All your patient data and functionality remains fully available."
 
 @router.get("/patients", response_model=RecentPatientsResponse)
-async def get_recent_patients():
-    """Get list of recent patients"""
+async def get_recent_patients(
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str = ""
+):
+    """Get list of recent patients, paged with next_cursor"""
     try:
-        result = list_recent_patients()
+        result = await list_recent_patients(limit, cursor)
         return RecentPatientsResponse(
             status=result["status"],
             recent_patients=result.get("recent_patients"),
+            next_cursor=result.get("next_cursor"),
             message=result.get("message")
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/patients/search", response_model=PatientSearchResponse)
+async def search_patients_by_name(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Ranked, typo-tolerant patient name search with pagination"""
+    try:
+        result = await search_patients(q, limit, offset)
+        return PatientSearchResponse(**result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats", response_model=APIResponse)
+async def get_cache_stats():
+    """Get hit/miss/eviction counters for the patient data caches"""
+    stats = await async_patient_memory.cache_stats()
+    stats["patient_resolver"] = patient_resolver.cache_stats()
+    stats["agent_sessions"] = session_registry.stats()
+    stats["briefs"] = brief_cache.stats()
+    return APIResponse(status="success", data=stats)
+
+@router.get("/llm/stats", response_model=APIResponse)
+async def get_llm_stats():
+    """Get queue depth, admission and rate limit counters for Gemini calls"""
+    return APIResponse(status="success", data=llm_scheduler.stats())
+
+@router.get("/sessions", response_model=APIResponse)
+async def get_agent_sessions():
+    """List live agent sessions with their history size in events and tokens"""
+    return APIResponse(status="success", data=session_registry.describe())
+
 @router.get("/patients/{patient_identifier}", response_model=PatientBriefResponse)
-async def get_patient_profile(patient_identifier: Union[str, int]):
-    """Get comprehensive patient profile by ID or name"""
+async def get_patient_profile(
+    patient_identifier: Union[str, int],
+    view: str = Query("", description="Named view: full, summary or alerts"),
+    fields: str = Query("", description="Comma-separated sections, e.g. patient_info,allergies")
+):
+    """Get patient profile by ID or name, optionally only the sections a screen needs"""
     try:
-        result = get_patient_brief(str(patient_identifier))
+        result = await get_patient_brief(str(patient_identifier), view, fields)
         return PatientBriefResponse(
             status=result["status"],
             patient_brief=result.get("patient_brief"),
@@ -44,6 +96,22 @@ async def get_patient_profile(patient_identifier: Union[str, int]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/patients/{patient_identifier}/records/{record_type}", response_model=PatientRecordsResponse)
+async def get_patient_records_page(
+    patient_identifier: Union[str, int],
+    record_type: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = ""
+):
+    """Page through a patient's consultations, medications, allergies or preferences"""
+    try:
+        result = await get_patient_records(
+            str(patient_identifier), record_type, limit, cursor
+        )
+        return PatientRecordsResponse(**result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/patients/{patient_identifier}/consultation", response_model=APIResponse)
 async def add_consultation(
     patient_identifier: Union[str, int], 
@@ -51,7 +119,7 @@ async def add_consultation(
 ):
     """Add consultation notes for a patient"""
     try:
-        result = add_consultation_notes(
+        result = await add_consultation_notes(
             str(patient_identifier), 
             request.doctor_name, 
             request.notes
@@ -70,7 +138,7 @@ async def update_memory(
 ):
     """Update patient memory (medications, allergies, preferences)"""
     try:
-        result = update_patient_memory(
+        result = await update_patient_memory(
             str(patient_identifier),
             request.memory_type,
             request.content,
@@ -83,22 +151,46 @@ async def update_memory(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/patients/{patient_identifier}/memory/batch", response_model=APIResponse)
+async def update_memory_batch(
+    patient_identifier: Union[str, int],
+    request: MemoryBatchRequest
+):
+    """Record several memory updates from one visit in a single call"""
+    try:
+        result = await record_patient_visit(str(patient_identifier), request.updates)
+        return APIResponse(
+            status=result["status"],
+            message=result["message"],
+            data=result.get("results")
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _agent_session(doctor_id: str, patient_identifier=None) -> str:
+    """Session for the doctor's conversation about a patient (or none)"""
+    patient_id = None
+    if patient_identifier is not None:
+        # Key by patient ID so "12345" and "Brigid O'Sullivan" share history
+        patient_id, error = await patient_resolver.resolve(
+            str(patient_identifier), check_exists=False
+        )
+        if error:
+            patient_id = str(patient_identifier)
+    return await session_registry.session_for(doctor_id, patient_id)
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(request: ChatMessage):
+async def chat_with_ai(
+    request: ChatMessage,
+    doctor_id: str = Header(DEFAULT_DOCTOR_ID, alias="X-Doctor-Id")
+):
     """Chat with the AI medical assistant"""
     try:
-        # Initialize session if it doesn't exist
-        try:
-            await initialize_session(DOCTOR_ID, SESSION_ID)
-        except Exception as init_error:
-            # Session might already exist, which is fine
-            print(f"Session initialization note: {init_error}")
-        
-        # Use the existing medical agent
+        session_id = await _agent_session(doctor_id, request.patient_id)
         response = await call_medical_agent(
             query=request.message,
-            doctor_id=DOCTOR_ID,
-            session_id=SESSION_ID
+            doctor_id=doctor_id,
+            session_id=session_id
         )
         
         return ChatResponse(
@@ -107,58 +199,142 @@ async def chat_with_ai(request: ChatMessage):
         )
     except Exception as e:
         error_str = str(e)
-        if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str:
+        if is_rate_limited(e):
             # Provide a helpful response when rate limited
             return ChatResponse(
-                response="I'm currently experiencing high demand (API rate limit reached). The system is working perfectly - you've just used up today's free API quota! You can wait for the limit to reset, upgrade your Google AI plan, or try again tomorrow. All your patient data and functionality remains fully available.",
+                response=RATE_LIMIT_MESSAGE,
                 timestamp=datetime.now().isoformat()
             )
         raise HTTPException(status_code=500, detail=f"AI chat error: {str(e)}")
 
+def _sse(event: dict) -> str:
+    """Format an agent event as a Server-Sent Events frame"""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_with_ai_stream(
+    request: ChatMessage,
+    doctor_id: str = Header(DEFAULT_DOCTOR_ID, alias="X-Doctor-Id")
+):
+    """Chat with the AI medical assistant, streaming text and tool progress as SSE"""
+    try:
+        session_id = await _agent_session(doctor_id, request.patient_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI chat error: {str(e)}")
+
+    async def events():
+        try:
+            async for event in stream_medical_agent(
+                query=request.message,
+                doctor_id=doctor_id,
+                session_id=session_id
+            ):
+                yield _sse(event)
+        except Exception as e:
+            # Headers are already sent, so errors travel as an event
+            error_str = str(e)
+            if is_rate_limited(e):
+                yield _sse({"type": "error", "message": RATE_LIMIT_MESSAGE})
+            else:
+                yield _sse({"type": "error", "message": f"AI chat error: {error_str}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _templated_brief(patient_identifier, consultation_prep: bool = False) -> ChatResponse:
+    """Render a brief from the stored profile, without calling the AI model"""
+    result = await build_patient_brief(str(patient_identifier), consultation_prep)
+    if result["status"] != "success":
+        raise HTTPException(status_code=404, detail=result.get("message"))
+    return ChatResponse(
+        response=result["text"],
+        timestamp=datetime.now().isoformat(),
+        brief=result["brief"]
+    )
+
 @router.get("/patients/{patient_identifier}/brief", response_model=ChatResponse)
 async def get_patient_brief_ai(patient_identifier: Union[str, int]):
-    """Get AI-generated patient brief for consultation prep"""
+    """Get the patient brief for consultation prep: allergies, medications, visits, preferences"""
     try:
-        # Initialize session if it doesn't exist
-        try:
-            await initialize_session(DOCTOR_ID, SESSION_ID)
-        except Exception as init_error:
-            print(f"Session initialization note: {init_error}")
-        
-        query = f"Generate a brief for patient {patient_identifier}"
-        response = await call_medical_agent(
-            query=query,
-            doctor_id=DOCTOR_ID,
-            session_id=SESSION_ID
-        )
-        
-        return ChatResponse(
-            response=response,
-            timestamp=datetime.now().isoformat()
-        )
+        return await _templated_brief(patient_identifier)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Brief generation error: {str(e)}")
+
+@router.get("/patients/{patient_identifier}/brief/narrative")
+async def stream_patient_brief_narrative(patient_identifier: Union[str, int]):
+    """Stream the templated brief, then an AI-written narrative summary of it, as SSE"""
+    try:
+        result = await build_patient_brief(str(patient_identifier))
+        if result["status"] != "success":
+            raise HTTPException(status_code=404, detail=result.get("message"))
+        # Keyed by the brief's content, so any change to the patient misses
+        cached = brief_cache.get(result["patient_id"], "narrative", result["text"])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Brief generation error: {str(e)}")
 
+    query = narrative_prompt(result["text"])
+
+    async def events():
+        yield _sse({"type": "brief", "brief": result["brief"], "text": result["text"]})
+        if cached is not None:
+            yield _sse({"type": "done", "response": cached, "cached": True})
+            return
+        try:
+            # Written outside any doctor's chat, as it is shared through the cache
+            async with narrative_session() as session_id:
+                async for event in stream_medical_agent(
+                    query=query,
+                    doctor_id=NARRATIVE_USER_ID,
+                    session_id=session_id
+                ):
+                    if event["type"] == "done" and event["response"] != NO_RESPONSE:
+                        brief_cache.set(
+                            result["patient_id"], "narrative", result["text"], event["response"]
+                        )
+                    yield _sse(event)
+        except Exception as e:
+            error_str = str(e)
+            if is_rate_limited(e):
+                yield _sse({"type": "error", "message": RATE_LIMIT_MESSAGE})
+            else:
+                yield _sse({"type": "error", "message": f"AI narrative error: {error_str}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/briefs/warm", response_model=APIResponse)
+async def warm_briefs(request: BriefWarmRequest):
+    """Pre-generate brief narratives for upcoming patients in the background"""
+    if not brief_warmer.start(request.patient_ids):
+        raise HTTPException(status_code=409, detail="A warming run is already in progress")
+    return APIResponse(
+        status="success",
+        message=f"Warming briefs for {len(request.patient_ids)} patients",
+        data=brief_warmer.status()
+    )
+
+@router.get("/briefs/warm", response_model=APIResponse)
+async def get_brief_warming_status():
+    """Progress of the current or last brief warming run"""
+    return APIResponse(status="success", data=brief_warmer.status())
+
 @router.post("/patients/{patient_identifier}/consultation-prep", response_model=ChatResponse)
 async def get_consultation_prep(patient_identifier: Union[str, int]):
-    """Get AI-generated consultation preparation"""
+    """Get consultation preparation: the brief plus key points and suggested questions"""
     try:
-        # Initialize session if it doesn't exist
-        try:
-            await initialize_session(DOCTOR_ID, SESSION_ID)
-        except Exception as init_error:
-            print(f"Session initialization note: {init_error}")
-        
-        query = f"Prepare me for consultation with patient {patient_identifier}. Give me key points, alerts, and suggested questions."
-        response = await call_medical_agent(
-            query=query,
-            doctor_id=DOCTOR_ID,
-            session_id=SESSION_ID
-        )
-        
-        return ChatResponse(
-            response=response,
-            timestamp=datetime.now().isoformat()
-        )
+        return await _templated_brief(patient_identifier, consultation_prep=True)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Consultation prep error: {str(e)}")
\ No newline at end of file
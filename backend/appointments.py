@@ -0,0 +1,9 @@
+def read_patient_list(path: str) -> list:
+    """
+    Read an appointment list: one patient ID or name per line.
+
+    Blank lines and lines starting with # are ignored.
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
@@ -0,0 +1,138 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from patient_store import PatientStore
+from storage import get_patient_memory
+
+
+class AsyncPatientMemory:
+    """
+    Awaitable counterpart of a PatientStore for use from the event loop.
+
+    Every call is handed to a bounded thread pool, so slow Couchbase queries
+    never block the loop and at most ``max_workers`` requests are in flight
+    against the cluster at once.
+    """
+
+    def __init__(self, memory: PatientStore = None, max_workers: int = 16):
+        self._memory = memory
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="patient-memory"
+        )
+
+    @property
+    def memory(self) -> PatientStore:
+        """The wrapped store, or the shared one (connected on first use)"""
+        # The shared store is looked up on every call so a reconnect after
+        # close_patient_memory() is picked up
+        return self._memory or get_patient_memory()
+
+    def _call(self, method: str, *args, **kwargs):
+        return getattr(self.memory, method)(*args, **kwargs)
+
+    async def _run(self, method: str, *args, **kwargs):
+        # The method is looked up on the worker thread, so a first call that
+        # has to connect the store never blocks the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(self._call, method, *args, **kwargs)
+        )
+
+    async def get_patient_profile(
+        self, patient_id: int, fields: str = None, view: str = None
+    ) -> dict:
+        """Get a patient profile, optionally reduced to some sections/fields"""
+        return await self._run("get_patient_profile", patient_id, fields, view)
+
+    async def patient_exists(self, patient_id: int) -> bool:
+        """Check that a patient exists"""
+        return await self._run("patient_exists", patient_id)
+
+    async def get_patient_records(
+        self, patient_id: int, collection_name: str, limit: int = 20, cursor=None
+    ) -> dict:
+        """Get one page of a patient's documents from a collection, newest first"""
+        return await self._run(
+            "get_patient_records", patient_id, collection_name, limit, cursor
+        )
+
+    async def search_patients(
+        self, query: str, limit: int = 10, offset: int = 0
+    ) -> dict:
+        """Ranked patient name search"""
+        return await self._run("search_patients", query, limit, offset)
+
+    async def get_patient_by_name(self, name: str) -> dict:
+        """Find patient by name"""
+        return await self._run("get_patient_by_name", name)
+
+    async def add_consultation_note(
+        self, patient_id: int, doctor: str, notes: str
+    ) -> bool:
+        """Add a new consultation note for a patient"""
+        return await self._run("add_consultation_note", patient_id, doctor, notes)
+
+    async def add_medication(
+        self,
+        patient_id: int,
+        medication: str,
+        prescribed_date: str = None,
+        status: str = "active",
+    ) -> bool:
+        """Add a new medication for a patient"""
+        return await self._run(
+            "add_medication", patient_id, medication, prescribed_date, status
+        )
+
+    async def add_allergy(
+        self,
+        patient_id: int,
+        allergen: str,
+        severity: str = "moderate",
+        notes: str = "",
+    ) -> bool:
+        """Add a new allergy for a patient"""
+        return await self._run("add_allergy", patient_id, allergen, severity, notes)
+
+    async def add_preference(
+        self, patient_id: int, category: str, preference: str, notes: str = ""
+    ) -> bool:
+        """Add a new preference for a patient"""
+        return await self._run(
+            "add_preference", patient_id, category, preference, notes
+        )
+
+    async def apply_updates(
+        self, patient_id: int, updates: list, validate: bool = True
+    ) -> dict:
+        """Write a batch of memory updates for one patient"""
+        return await self._run("apply_updates", patient_id, updates, validate)
+
+    async def list_recent_patients(self, limit: int = 10) -> list:
+        """Get list of patients ordered by most recent consultation"""
+        return await self._run("list_recent_patients", limit)
+
+    async def list_patients_page(self, limit: int = 10, cursor=None) -> dict:
+        """Get one page of patients ordered by most recent consultation"""
+        return await self._run("list_patients_page", limit, cursor)
+
+    async def name_index_version(self) -> int:
+        """Counter that changes whenever a patient is created or renamed"""
+        return await self._run("name_index_version")
+
+    async def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters for the in-process caches"""
+        # Run on the pool too: looking up the shared store may connect it
+        return await self._run("cache_stats")
+
+    def close(self):
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=False)
+
+
+# Initialize global async patient memory instance
+PATIENT_MEMORY_WORKERS = int(os.getenv("PATIENT_MEMORY_WORKERS", "16"))
+
+async_patient_memory = AsyncPatientMemory(max_workers=PATIENT_MEMORY_WORKERS)
@@ -0,0 +1,107 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+from cache import LRUCache
+
+
+class BriefCache:
+    """
+    Cache of AI-generated brief text, addressed by the content it was made from.
+
+    Entries are keyed by patient ID, prompt type (e.g. "narrative") and a hash
+    of the prompt's source content, i.e. the rendered patient brief. Any write
+    to the patient changes that content and so the key, which makes stale
+    entries unreachable without explicit invalidation, also for writes made
+    by other processes. Entries live in an in-process LRU and, when a path is
+    given, in a SQLite file so they survive restarts.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = None, path: str = None):
+        """
+        Args:
+            max_size: Maximum number of entries kept in memory
+            ttl: Optional in-memory time-to-live in seconds
+            path: Optional SQLite file backing the in-memory cache
+        """
+        self._memory = LRUCache(max_size=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._db = None
+        self.store_hits = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS briefs ("
+                "key TEXT PRIMARY KEY, patient_id TEXT, kind TEXT, "
+                "response TEXT, created_at TEXT)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS briefs_patient ON briefs (patient_id, kind)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(patient_id, kind: str, content: str) -> str:
+        """Cache key for a prompt type over a patient's source content"""
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        return f"{patient_id}:{kind}:{digest}"
+
+    def get(self, patient_id, kind: str, content: str):
+        """
+        Look up a generated brief.
+
+        Returns:
+            The cached text, or None if this content has not been seen
+        """
+        key = self.key(patient_id, kind, content)
+        value = self._memory.get(key)
+        if value is not None or self._db is None:
+            return value
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response FROM briefs WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        self.store_hits += 1
+        self._memory.set(key, row[0])
+        return row[0]
+
+    def set(self, patient_id, kind: str, content: str, response: str):
+        """Store a generated brief, replacing the patient's older ones of this kind"""
+        key = self.key(patient_id, kind, content)
+        self._memory.set(key, response)
+        if self._db is None:
+            return
+
+        with self._lock:
+            # Older hashes can never be hit again, so keep one row per kind
+            self._db.execute(
+                "DELETE FROM briefs WHERE patient_id = ? AND kind = ?",
+                (str(patient_id), kind),
+            )
+            self._db.execute(
+                "INSERT INTO briefs VALUES (?, ?, ?, ?, ?)",
+                (key, str(patient_id), kind, response, datetime.now().isoformat()),
+            )
+            self._db.commit()
+
+    def stats(self) -> dict:
+        """In-memory counters plus persistent store size and hits"""
+        stats = self._memory.stats()
+        stats["persistent"] = self._db is not None
+        if self._db is not None:
+            with self._lock:
+                stats["stored"] = self._db.execute(
+                    "SELECT COUNT(*) FROM briefs"
+                ).fetchone()[0]
+            stats["store_hits"] = self.store_hits
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
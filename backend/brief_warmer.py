@@ -0,0 +1,189 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from medical_agent import (
+    NARRATIVE_USER_ID,
+    NO_RESPONSE,
+    call_medical_agent,
+    narrative_prompt,
+    narrative_session,
+)
+from llm_scheduler import BACKGROUND, is_rate_limited, request_priority
+from medical_tools import brief_cache, build_patient_brief
+
+
+async def warm_narrative(patient_identifier, before_model=None) -> str:
+    """
+    Generate and cache the brief narrative for one patient.
+
+    Args:
+        patient_identifier: Patient ID or name
+        before_model: Optional coroutine function awaited right before the
+            model is called, for pacing; not awaited on a cache hit
+
+    Returns:
+        "cached" if the narrative for the current brief was already cached,
+        "warmed" if it was generated now. Raises on failure.
+    """
+    result = await build_patient_brief(str(patient_identifier))
+    if result["status"] != "success":
+        raise LookupError(result.get("message"))
+
+    patient_id, text = result["patient_id"], result["text"]
+    if brief_cache.get(patient_id, "narrative", text) is not None:
+        return "cached"
+
+    if before_model is not None:
+        await before_model()
+    # Doctors' interactive requests are admitted to the model first
+    token = request_priority.set(BACKGROUND)
+    try:
+        async with narrative_session() as session_id:
+            response = await call_medical_agent(
+                query=narrative_prompt(text),
+                doctor_id=NARRATIVE_USER_ID,
+                session_id=session_id,
+            )
+    finally:
+        request_priority.reset(token)
+    if response == NO_RESPONSE:
+        raise RuntimeError(NO_RESPONSE)
+    brief_cache.set(patient_id, "narrative", text, response)
+    return "warmed"
+
+
+class BriefWarmer:
+    """
+    Pre-generates brief narratives for the day's upcoming patients.
+
+    At most `concurrency` patients are warmed at a time and model calls start
+    at least `min_interval` seconds apart. Model calls run at background
+    priority through the LLM scheduler, which owns retries and backoff on
+    rate limits; a patient whose call still fails is recorded as failed and
+    the run moves on.
+    """
+
+    def __init__(
+        self,
+        warm=warm_narrative,
+        concurrency: int = 2,
+        min_interval: float = 2.0,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+    ):
+        """
+        Args:
+            warm: Coroutine function (patient_identifier, before_model)
+                returning "cached" or "warmed"
+            concurrency: Maximum patients warmed at once
+            min_interval: Minimum seconds between model call starts
+            clock: Time source, replaceable in tests
+            sleep: Sleep coroutine, replaceable in tests
+        """
+        self._warm = warm
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._next_start = 0.0  # earliest time the next model call may start
+        self._pace_lock = asyncio.Lock()
+        self._task = None
+        self.run = None
+
+    async def _pace(self):
+        # Starts are handed out one at a time, min_interval apart
+        async with self._pace_lock:
+            wait = self._next_start - self._clock()
+            if wait > 0:
+                await self._sleep(wait)
+            self._next_start = max(self._next_start, self._clock()) + self.min_interval
+
+    async def _warm_one(self, patient_identifier, run: dict):
+        try:
+            outcome = await self._warm(patient_identifier, self._pace)
+        except Exception as e:
+            # The scheduler has already retried rate limits as far as it will
+            if is_rate_limited(e):
+                run["rate_limited"] += 1
+            run["failed"] += 1
+            run["errors"][str(patient_identifier)] = str(e)
+            return
+        run[outcome] += 1
+
+    async def warm(self, patient_identifiers) -> dict:
+        """
+        Warm the narratives of a list of patients and wait for the result.
+
+        Args:
+            patient_identifiers: Patient IDs or names; duplicates are skipped
+
+        Returns:
+            Run summary with counts of warmed, already cached and failed
+            patients, failures due to rate limits, and per-patient errors
+        """
+        patients = list(dict.fromkeys(str(p).strip() for p in patient_identifiers))
+        patients = [p for p in patients if p]
+        run = {
+            "requested": len(patients),
+            "warmed": 0,
+            "cached": 0,
+            "failed": 0,
+            "rate_limited": 0,
+            "errors": {},
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+        }
+        self.run = run
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(patient_identifier):
+            async with semaphore:
+                await self._warm_one(patient_identifier, run)
+
+        await asyncio.gather(*(worker(p) for p in patients))
+        run["finished_at"] = datetime.now().isoformat()
+        print(
+            f"[Brief Warmer] Warmed {run['warmed']}, already cached {run['cached']}, "
+            f"failed {run['failed']} of {run['requested']} patients"
+        )
+        return run
+
+    def start(self, patient_identifiers) -> bool:
+        """
+        Warm patients in the background.
+
+        Returns:
+            False if a run is already in progress, True otherwise
+        """
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self.warm(patient_identifiers))
+        return True
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> dict:
+        """Whether a run is in progress, and the current or last run summary"""
+        return {"running": self.running, "run": self.run}
+
+    async def stop(self):
+        """Cancel a background run, if any"""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+# Initialize global brief warmer
+brief_warmer = BriefWarmer(
+    concurrency=int(os.getenv("BRIEF_WARM_CONCURRENCY", "2")),
+    min_interval=float(os.getenv("BRIEF_WARM_INTERVAL", "2")),
+)
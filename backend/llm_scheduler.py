@@ -0,0 +1,269 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import time
+
+# Request priorities, most urgent first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Priority of the model calls made on behalf of the current request
+request_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+class SchedulerBusy(Exception):
+    """Raised when too many model calls are already waiting for quota"""
+
+
+def is_rate_limited(error) -> bool:
+    """Whether an error is Gemini reporting an exhausted quota"""
+    if isinstance(error, SchedulerBusy):
+        return True
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+class LLMScheduler:
+    """
+    Admission control for Gemini calls, shared by every request in the worker.
+
+    Calls are admitted by a token bucket refilled at the quota's requests per
+    minute, so bursts are smoothed out instead of all hitting the quota at
+    once. Callers waiting for a token are served by priority (interactive
+    chat before background warming), then first come, first served; beyond
+    max_queue waiting calls new ones are rejected with SchedulerBusy. When
+    Gemini still answers 429, admission pauses for an exponential backoff
+    with jitter, after which a single call probes the quota before the
+    bucket refills, and the failed call is retried.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 15,
+        burst: int = 3,
+        max_queue: int = 50,
+        max_retries: int = 4,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+        jitter=random.random,
+    ):
+        """
+        Args:
+            requests_per_minute: Sustained rate of model calls admitted
+            burst: Calls that may be admitted back to back after a quiet spell
+            max_queue: Maximum calls waiting for admission
+            max_retries: Retries of a call rejected with a rate limit
+            base_delay: Backoff after the first rate limit, doubled on each
+                further retry of the same call
+            max_delay: Upper bound on a single backoff
+            clock: Time source, replaceable in tests
+            sleep: Sleep coroutine, replaceable in tests
+            jitter: Source of random numbers in [0, 1), replaceable in tests
+        """
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._waiting = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._dispatcher = None
+
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.peak_queue_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self, now: float):
+        # No tokens accrue while admission is paused after a rate limit
+        start = max(self._updated, min(self._paused_until, now))
+        if now > start:
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def _wait_time(self) -> float:
+        """Seconds until the next call can be admitted"""
+        now = self._clock()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        # Tolerate float rounding, or a tiny sleep may never make a token
+        if self._tokens >= 1 - 1e-9:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def _dispatch(self):
+        # One dispatcher hands out tokens while anyone is waiting; it checks
+        # the heap afresh after every sleep, so a call that arrived in the
+        # meantime with a higher priority goes first
+        try:
+            while self._waiting:
+                wait = self._wait_time()
+                if wait > 0:
+                    await self._sleep(wait)
+                    continue
+                _, _, future = heapq.heappop(self._waiting)
+                if future.done():
+                    continue  # the caller gave up waiting
+                self._tokens -= 1
+                future.set_result(None)
+        finally:
+            self._dispatcher = None
+
+    async def acquire(self, priority: int = None):
+        """
+        Wait until a model call may start.
+
+        Args:
+            priority: INTERACTIVE or BACKGROUND; defaults to the priority set
+                for the current request
+
+        Raises:
+            SchedulerBusy: If max_queue calls are already waiting
+        """
+        if priority is None:
+            priority = request_priority.get()
+        if not self._waiting and self._wait_time() <= 0:
+            self._tokens -= 1
+            self.admitted += 1
+            return
+
+        if len(self._waiting) >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerBusy(
+                f"{len(self._waiting)} AI requests are already waiting for quota"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiting, entry)
+        self.peak_queue_depth = max(self.peak_queue_depth, len(self._waiting))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        started = self._clock()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Leave the queue at once, so callers that gave up (e.g. clients
+            # that disconnected) do not count towards max_queue
+            if entry in self._waiting:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+            raise
+        waited = self._clock() - started
+        self.admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    def retry_delay(self, error, attempt: int):
+        """
+        Decide whether a failed call should be retried.
+
+        A rate limit pauses admission for everyone, since the quota is
+        shared, for an exponential backoff with jitter.
+
+        Args:
+            error: Exception raised by the call
+            attempt: Number of retries already made for this call
+
+        Returns:
+            Seconds admission is paused for, or None if the call should fail
+        """
+        if isinstance(error, SchedulerBusy) or not is_rate_limited(error):
+            return None
+        self.rate_limited += 1
+        if attempt >= self.max_retries:
+            return None
+
+        ceiling = min(self.max_delay, self.base_delay * 2**attempt)
+        delay = ceiling / 2 + self._jitter() * ceiling / 2
+        now = self._clock()
+        self._refill(now)
+        # A single call probes the quota when the pause ends
+        self._tokens = 1.0
+        self._paused_until = max(self._paused_until, now + delay)
+        self.retries += 1
+        print(f"[LLM Scheduler] Rate limited, pausing admission for {delay:.1f}s")
+        return delay
+
+    async def stream(self, call, priority: int = None):
+        """
+        Run a streaming model call under admission control, retrying on rate
+        limits.
+
+        A call that fails after it yielded anything is not retried, so no
+        response is yielded twice.
+
+        Args:
+            call: Zero-argument function starting one attempt of the model
+                call and returning an async iterator of its responses
+            priority: INTERACTIVE or BACKGROUND; defaults to the priority set
+                for the current request
+
+        Yields:
+            The responses of the attempt that succeeded
+        """
+        attempt = 0
+        while True:
+            await self.acquire(priority)
+            started = False
+            try:
+                async for response in call():
+                    started = True
+                    yield response
+                return
+            except Exception as e:
+                if started or self.retry_delay(e, attempt) is None:
+                    raise
+                attempt += 1
+
+    def stats(self) -> dict:
+        """Queue depth, admission counters and waiting times"""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._waiting:
+            if not future.done():
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                depth[name] = depth.get(name, 0) + 1
+        waited = self.admitted or 1
+        self._refill(self._clock())
+        return {
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_priority": depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "tokens": round(self._tokens, 2),
+            "paused_for_s": round(max(0.0, self._paused_until - self._clock()), 1),
+            "requests_per_minute": self.rate * 60,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "avg_wait_ms": round(self._total_wait / waited * 1000, 1),
+            "max_wait_ms": round(self._max_wait * 1000, 1),
+        }
+
+
+# Initialize global scheduler, sized to the Gemini quota
+llm_scheduler = LLMScheduler(
+    requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "15")),
+    burst=int(os.getenv("LLM_BURST", "3")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "50")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+)
@@ -1,34 +1,27 @@
-import io
-from contextlib import redirect_stderr
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from google.adk.agents import Agent
-from google.adk.sessions import InMemorySessionService
-from google.adk.runners import Runner
-from google.genai import types
-
 from medical_tools import (
     get_patient_brief,
     add_consultation_notes,
     list_recent_patients,
     update_patient_memory,
+    record_patient_visit,
+    search_patients,
+    get_patient_records,
 )
+from request_context import request_context
+from sessions import SessionRegistry
+from startup import timed
 
 # Load environment variables
 load_dotenv()
 
 
-def set_user_context(func, user_id: str):
-    """Set user context for tool functions (similar to travel example)"""
-    setattr(func, "user_id", user_id)
-
-
-# Create the medical AI agent
-medical_agent = Agent(
-    name="medical_assistant",
-    model="gemini-2.0-flash-exp",  # Using the latest Gemini model
-    description="An AI medical assistant that helps doctors access patient information and manage consultation notes.",
-    instruction="""
+AGENT_INSTRUCTION = """
 You are a professional medical AI assistant designed to help doctors prepare for consultations and manage patient records.
 
 Your primary functions:
@@ -36,6 +29,9 @@ Your primary functions:
 2. **Consultation Notes**: Help doctors add consultation notes using add_consultation_notes
 3. **Patient Management**: List and search recent patients using list_recent_patients
 4. **Update Patient Memory**: Flexibly add medications, allergies, preferences using update_patient_memory
+5. **Record Visits**: Save several updates from one consultation at once using record_patient_visit
+6. **Patient Search**: Find patients by (partial or misspelt) name using search_patients
+7. **Patient History**: Page through older consultations and other records using get_patient_records
 
 Guidelines:
 - Always prioritize patient privacy and confidentiality
@@ -46,6 +42,7 @@ Guidelines:
 - Use medical terminology appropriately but keep summaries accessible
 - Be contextually aware: if you just discussed a particular patient(s), remember their IDs for follow-up questions
 - When a doctor refers to a patient by first name or mentions "the last session with [name]", use the patient ID you know from context (unless there's ambiguity)
+- If a name could match several patients (a tool returns "candidates"), use search_patients if needed and ask the doctor to confirm which patient they mean before reading or updating records
 
 Patient Brief Workflow:
 1. Use get_patient_brief with either patient ID (e.g., "12345") or patient name (e.g., "Brigid O'Sullivan")
@@ -54,6 +51,7 @@ Patient Brief Workflow:
    - Current medications and allergies
    - Recent consultations and concerns
    - Patient preferences for care
+3. Briefs include only the most recent consultations; if consultations_next_cursor is set and older history matters, fetch it with get_patient_records
 
 Consultation Notes Workflow:
 1. Use add_consultation_notes with patient identifier, doctor name, and detailed notes
@@ -72,6 +70,7 @@ Memory Update Workflow:
    - For preferences: "preference" (handles "prefers", "likes", "wants", etc.)
 3. Extract key information from natural phrasing
 4. Include severity details for allergies when mentioned
+5. When a doctor gives several updates at once (e.g. a note, two prescriptions and an allergy), send them together in one record_patient_visit call instead of calling update_patient_memory repeatedly
 
 Examples of flexible phrasing you should handle:
 - "Patient is now taking metformin 500mg twice daily"
@@ -82,27 +81,164 @@ Examples of flexible phrasing you should handle:
 - "Note that patient likes detailed explanations"
 
 Remember: You are assisting healthcare professionals in providing better patient care through organized information access. Be flexible with how doctors phrase their updates.
-""",
-    tools=[
-        get_patient_brief,
-        add_consultation_notes,
-        list_recent_patients,
-        update_patient_memory,
-    ],
-)
+"""
 
-# Session service for managing conversations
-session_service = InMemorySessionService()
 APP_NAME = "medicai_assistant"
 
-# Runner for executing the agent
-runner = Runner(
-    agent=medical_agent,
-    app_name=APP_NAME,
-    session_service=session_service,
+_runner = None
+_session_service = None
+_runner_lock = threading.Lock()
+
+
+# One session per (doctor, patient) for the web API
+session_registry = SessionRegistry(
+    APP_NAME,
+    lambda: get_session_service(),
+    idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "1800")),
+    max_sessions=int(os.getenv("MAX_SESSIONS", "1000")),
 )
 
 
+def _build_runner():
+    """Import the ADK and build the agent, session service and runner"""
+    with timed("import google-adk"):
+        from google.adk.agents import Agent
+        from google.adk.runners import Runner
+        from session_service import CompactingInMemorySessionService
+        from scheduled_model import ScheduledGemini
+
+    # Silence google-genai's "non-text parts in the response" warning for
+    # function call responses; a logger level, unlike redirecting stderr,
+    # does not affect other requests in flight
+    logging.getLogger("google_genai.types").setLevel(logging.ERROR)
+
+    with timed("build medical agent"):
+        # Create the medical AI agent
+        medical_agent = Agent(
+            name="medical_assistant",
+            # Using the latest Gemini model; its calls are rate limited and
+            # retried by the shared LLM scheduler
+            model=ScheduledGemini(model="gemini-2.0-flash-exp"),
+            description="An AI medical assistant that helps doctors access patient information and manage consultation notes.",
+            instruction=AGENT_INSTRUCTION,
+            tools=[
+                get_patient_brief,
+                add_consultation_notes,
+                list_recent_patients,
+                update_patient_memory,
+                record_patient_visit,
+                search_patients,
+                get_patient_records,
+            ],
+        )
+
+        # Session service for managing conversations; older turns of long
+        # conversations are compacted into a summary
+        session_service = CompactingInMemorySessionService(
+            token_budget=int(os.getenv("SESSION_TOKEN_BUDGET", "8000")),
+            keep_turns=int(os.getenv("SESSION_KEEP_TURNS", "4")),
+            max_events=int(os.getenv("SESSION_MAX_EVENTS", "200")),
+        )
+
+        # Runner for executing the agent
+        runner = Runner(
+            agent=medical_agent,
+            app_name=APP_NAME,
+            session_service=session_service,
+        )
+
+    return runner, session_service
+
+
+def get_runner():
+    """Return the shared agent runner, building it on first use"""
+    global _runner, _session_service
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner, _session_service = _build_runner()
+    return _runner
+
+
+def get_session_service():
+    """Return the session service shared with the runner"""
+    get_runner()
+    return _session_service
+
+
+def warm_up():
+    """Build the agent and runner ahead of the first request"""
+    get_runner()
+
+
+async def shutdown():
+    """Close the shared runner, if it was ever built"""
+    global _runner, _session_service
+    if _runner is not None:
+        await session_registry.clear()
+    with _runner_lock:
+        runner, _runner, _session_service = _runner, None, None
+    if runner is not None:
+        await runner.close()
+
+
+# Returned when the agent finishes without producing any text
+NO_RESPONSE = "No response received from medical assistant."
+
+
+def narrative_prompt(brief_text: str) -> str:
+    """
+    Prompt for a narrative summary of a templated patient brief.
+
+    The brief is included in full, so the model answers in one round trip
+    without calling any tools.
+    """
+    return (
+        "Write a short narrative summary (3-4 sentences) of this patient for the "
+        "doctor before their consultation. Everything you need is below; do not "
+        f"call any tools.\n\n{brief_text}"
+    )
+
+
+# ADK user the throwaway narrative sessions belong to; never used for chat
+NARRATIVE_USER_ID = "BriefNarrator"
+
+
+@asynccontextmanager
+async def narrative_session():
+    """
+    Fresh agent session for writing one narrative, deleted afterwards.
+
+    Narratives are cached and served to every doctor, so they are written
+    without any conversation history and depend only on the patient record.
+
+    Yields:
+        ADK session ID, belonging to NARRATIVE_USER_ID
+    """
+    session_service = get_session_service()
+    session = await session_service.create_session(
+        app_name=APP_NAME, user_id=NARRATIVE_USER_ID
+    )
+    try:
+        yield session.id
+    finally:
+        try:
+            await session_service.delete_session(
+                app_name=APP_NAME, user_id=NARRATIVE_USER_ID, session_id=session.id
+            )
+        except Exception as e:
+            print(f"[Sessions] Error deleting session {session.id}: {e}")
+
+
+def _text_of(event) -> str:
+    """Concatenated text parts of an event (function call parts are skipped)"""
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(
+        part.text for part in event.content.parts if getattr(part, "text", None)
+    )
+
+
 async def call_medical_agent(query: str, doctor_id: str, session_id: str):
     """
     Call the medical AI agent with a query
@@ -115,40 +251,88 @@ async def call_medical_agent(query: str, doctor_id: str, session_id: str):
     Returns:
         AI agent's response
     """
-    content = types.Content(role="user", parts=[types.Part(text=query)])
-
-    # Set user context for tools (similar to travel example)
-    set_user_context(get_patient_brief, doctor_id)
-    set_user_context(add_consultation_notes, doctor_id)
-    set_user_context(list_recent_patients, doctor_id)
-    set_user_context(update_patient_memory, doctor_id)
+    from google.genai import types
 
-    # Suppress warning messages from Google ADK about function calls
-    stderr_capture = io.StringIO()
+    runner = get_runner()
+    content = types.Content(role="user", parts=[types.Part(text=query)])
 
-    with redirect_stderr(stderr_capture):
+    # Tools see this request's doctor and session through request_context
+    with request_context(doctor_id, session_id):
         async for event in runner.run_async(
             user_id=doctor_id, session_id=session_id, new_message=content
         ):
             if event.is_final_response() and event.content and event.content.parts:
                 # Extract only text parts to avoid function call warnings
-                text_parts = [
-                    part.text
-                    for part in event.content.parts
-                    if hasattr(part, "text") and part.text
-                ]
-                if text_parts:
-                    return "".join(text_parts)
+                text = _text_of(event)
+                if text:
+                    return text
                 else:
                     # Fallback to first part if no text parts found
                     final_response = event.content.parts[0].text
                     return final_response
 
-    return "No response received from medical assistant."
+    return NO_RESPONSE
+
+
+async def stream_medical_agent(query: str, doctor_id: str, session_id: str):
+    """
+    Call the medical AI agent and yield its progress as it happens
+
+    Args:
+        query: Doctor's question or request
+        doctor_id: Identifier for the doctor
+        session_id: Session identifier for conversation continuity
+
+    Yields:
+        Event dicts, in order:
+        - {"type": "text", "text": ...} for each chunk of response text
+        - {"type": "tool_call", "name": ..., "args": {...}} when the agent
+          calls a tool, and {"type": "tool_result", "name": ..., "status": ...}
+          when it returns
+        - {"type": "done", "response": ...} with the complete response text
+    """
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai import types
+
+    runner = get_runner()
+    content = types.Content(role="user", parts=[types.Part(text=query)])
+
+    response = ""
+    streamed = False  # whether the current model turn arrived as partials
+    with request_context(doctor_id, session_id):
+        async for event in runner.run_async(
+            user_id=doctor_id,
+            session_id=session_id,
+            new_message=content,
+            run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+        ):
+            for call in event.get_function_calls():
+                yield {"type": "tool_call", "name": call.name, "args": call.args or {}}
+            for result in event.get_function_responses():
+                status = (result.response or {}).get("status")
+                yield {"type": "tool_result", "name": result.name, "status": status}
+
+            text = _text_of(event)
+            if event.partial:
+                if text:
+                    streamed = True
+                    response += text
+                    yield {"type": "text", "text": text}
+            elif text and not streamed:
+                # Aggregated turn text that was not streamed as partials
+                response += text
+                yield {"type": "text", "text": text}
+            if not event.partial:
+                streamed = False
+
+    yield {
+        "type": "done",
+        "response": response or NO_RESPONSE,
+    }
 
 
 async def initialize_session(doctor_id: str, session_id: str):
     """Initialize the session service"""
-    await session_service.create_session(
+    await get_session_service().create_session(
         app_name=APP_NAME, user_id=doctor_id, session_id=session_id
     )
@@ -1,31 +1,138 @@
-from patient_memory import patient_memory
+import os
+from datetime import date
+from typing import List
 
+from async_memory import AsyncPatientMemory, async_patient_memory
+from brief_cache import BriefCache
+from cache import LRUCache
+from models import MemoryUpdateRequest
+from name_search import normalize_name
+from records import RECORD_BUILDERS
 
-def get_patient_brief(patient_identifier: str) -> dict:
+
+class PatientResolver:
+    """
+    Resolves patient IDs and names to a patient ID.
+
+    Name lookups are cached (bounded LRU with a TTL) as the set of
+    best-ranked candidates, so repeat references to a patient within a
+    session skip the name search. Entries are tagged with the store's name
+    index version and ignored once a patient is created or renamed.
+    """
+
+    def __init__(
+        self,
+        memory: AsyncPatientMemory,
+        cache_size: int = 1024,
+        cache_ttl: float = 300,
+        max_candidates: int = 5,
+    ):
+        self.memory = memory
+        self.cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+        self.max_candidates = max_candidates
+
+    async def candidates(self, name: str) -> list:
+        """Best-ranked {patient_id, name} matches for a name; ties are ambiguous"""
+        key = " ".join(normalize_name(name))
+        version = await self.memory.name_index_version()
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        results = (await self.memory.search_patients(name, self.max_candidates))[
+            "results"
+        ]
+        best = [
+            {"patient_id": r["patient_id"], "name": r["name"]}
+            for r in results
+            if r["score"] == results[0]["score"]
+        ]
+        # Misses are not cached, so a patient added elsewhere is found as
+        # soon as the store sees them
+        if best:
+            self.cache.set(key, (version, best))
+        return best
+
+    async def resolve(self, patient_identifier: str, check_exists: bool = True):
+        """
+        Resolve a patient ID or name to a known patient ID.
+
+        Args:
+            patient_identifier: Either patient ID (number) or patient name (string)
+            check_exists: Whether to confirm a numeric ID exists
+
+        Returns:
+            (patient_id, None) on success, or (None, error dict) if the patient
+            does not exist or the name matches several patients equally well
+        """
+        try:
+            patient_id = int(patient_identifier)
+        except ValueError:
+            candidates = await self.candidates(patient_identifier)
+            if len(candidates) == 1:
+                return candidates[0]["patient_id"], None
+            if candidates:
+                return None, {
+                    "status": "error",
+                    "message": (
+                        f"Several patients match '{patient_identifier}'; "
+                        "please confirm the patient ID"
+                    ),
+                    "candidates": candidates,
+                }
+        else:
+            if not check_exists or await self.memory.patient_exists(patient_id):
+                return patient_id, None
+
+        return None, {
+            "status": "error",
+            "message": f"Patient not found: {patient_identifier}",
+        }
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+
+# Initialize global patient resolver
+patient_resolver = PatientResolver(
+    async_patient_memory,
+    cache_size=int(os.getenv("RESOLVER_CACHE_SIZE", "1024")),
+    cache_ttl=float(os.getenv("RESOLVER_CACHE_TTL", "300")),
+)
+
+# AI-written narratives, reused until the patient's brief changes
+brief_cache = BriefCache(
+    max_size=int(os.getenv("BRIEF_CACHE_SIZE", "1024")),
+    path=os.getenv("BRIEF_CACHE_PATH") or None,
+)
+
+
+async def get_patient_brief(
+    patient_identifier: str, view: str = "", fields: str = ""
+) -> dict:
     """
     Get comprehensive patient brief for consultation preparation.
 
     Args:
         patient_identifier: Either patient ID (number) or patient name (string)
+        view: Optional slim view: "summary" (demographics, medications,
+            allergies) or "alerts" (allergies only); empty for the full brief
+        fields: Optional comma-separated sections to return, e.g.
+            "patient_info,allergies"; empty for the full brief
 
     Returns:
         Dictionary with patient brief information or error message
     """
     try:
-        # Try to parse as patient ID first
-        try:
-            patient_id = int(patient_identifier)
-            profile = patient_memory.get_patient_profile(patient_id)
-        except ValueError:
-            # If not a number, search by name
-            patient_info = patient_memory.get_patient_by_name(patient_identifier)
-            if patient_info:
-                profile = patient_memory.get_patient_profile(patient_info["patient_id"])
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Patient not found: {patient_identifier}",
-                }
+        patient_id, error = await patient_resolver.resolve(
+            patient_identifier, check_exists=False
+        )
+        if error:
+            return error
+
+        profile = await async_patient_memory.get_patient_profile(
+            patient_id, fields or None, view or None
+        )
 
         if not profile:
             return {
@@ -42,7 +149,182 @@ def get_patient_brief(patient_identifier: str) -> dict:
         }
 
 
-def add_consultation_notes(
+# Allergy severities, most serious first
+SEVERITY_ORDER = ("severe", "moderate", "mild")
+
+
+def _age(date_of_birth: str):
+    try:
+        born = date.fromisoformat(date_of_birth[:10])
+    except (TypeError, ValueError):
+        return None
+    today = date.today()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def render_patient_brief(
+    profile: dict, recent_visits: int = 3, consultation_prep: bool = False
+) -> dict:
+    """
+    Render a patient brief from a profile with fixed templates, no LLM call.
+
+    Args:
+        profile: Full patient profile as returned by get_patient_profile
+        recent_visits: Number of most recent consultations to include
+        consultation_prep: Also add key points and suggested questions for
+            the upcoming consultation
+
+    Returns:
+        Dictionary with the structured "sections" and their markdown "text"
+    """
+    info = profile.get("patient_info", {})
+    severity = {name: rank for rank, name in enumerate(SEVERITY_ORDER)}
+    allergies = sorted(
+        profile.get("allergies", []),
+        key=lambda a: severity.get(str(a.get("severity", "")).lower(), len(severity)),
+    )
+    medications = [
+        m
+        for m in profile.get("medications", [])
+        if str(m.get("status", "active")).lower() == "active"
+    ]
+    visits = profile.get("consultations", [])[:recent_visits]
+    preferences = profile.get("preferences", [])
+
+    sections = {
+        "patient": {
+            "patient_id": info.get("patient_id"),
+            "name": info.get("name"),
+            "date_of_birth": info.get("date_of_birth"),
+            "age": _age(info.get("date_of_birth")),
+            "last_seen": info.get("last_seen"),
+        },
+        "allergies": [
+            {
+                "allergen": a.get("allergen"),
+                "severity": a.get("severity"),
+                "notes": a.get("notes"),
+            }
+            for a in allergies
+        ],
+        "active_medications": [
+            {"medication": m.get("medication"), "since": m.get("prescribed_date")}
+            for m in medications
+        ],
+        "recent_visits": [
+            {"date": c.get("date"), "doctor": c.get("doctor"), "notes": c.get("notes")}
+            for c in visits
+        ],
+        "preferences": [
+            {
+                "category": p.get("category"),
+                "preference": p.get("preference"),
+                "notes": p.get("notes"),
+            }
+            for p in preferences
+        ],
+    }
+
+    patient = sections["patient"]
+    heading = f"## {patient['name']} (ID {patient['patient_id']})"
+    details = []
+    if patient["age"] is not None:
+        details.append(f"Age {patient['age']} (born {patient['date_of_birth']})")
+    if patient["last_seen"]:
+        details.append(f"last seen {patient['last_seen']}")
+    lines = [heading]
+    if details:
+        lines.append(", ".join(details))
+
+    def section(title, items, empty):
+        lines.append("")
+        lines.append(f"### {title}")
+        lines.extend(items or [empty])
+
+    section(
+        "⚠️ Allergies",
+        [
+            f"- **{a['allergen']}** ({a['severity']})"
+            + (f": {a['notes']}" if a["notes"] else "")
+            for a in sections["allergies"]
+        ],
+        "- No known allergies",
+    )
+    section(
+        "Active Medications",
+        [
+            f"- {m['medication']}" + (f" (since {m['since']})" if m["since"] else "")
+            for m in sections["active_medications"]
+        ],
+        "- None",
+    )
+    section(
+        "Recent Visits",
+        [
+            f"- {v['date']}, {v['doctor']}: {v['notes']}"
+            for v in sections["recent_visits"]
+        ],
+        "- No consultations on record",
+    )
+    section(
+        "Preferences",
+        [
+            f"- {p['category']}: {p['preference']}"
+            + (f" ({p['notes']})" if p["notes"] else "")
+            for p in sections["preferences"]
+        ],
+        "- None recorded",
+    )
+
+    if consultation_prep:
+        history = info.get("medical_history") or []
+        sections["key_points"] = list(history)
+        questions = []
+        if visits:
+            questions.append(
+                f"How have things been since the last visit on {visits[0].get('date')}?"
+            )
+        questions.extend(
+            f"Any side effects or problems taking {m['medication']}?"
+            for m in sections["active_medications"]
+        )
+        questions.append("Any new allergies or reactions since the last visit?")
+        sections["suggested_questions"] = questions
+
+        section("Key Points", [f"- {point}" for point in history], "- None recorded")
+        section("Suggested Questions", [f"- {q}" for q in questions], "")
+
+    return {"sections": sections, "text": "\n".join(lines)}
+
+
+async def build_patient_brief(
+    patient_identifier: str, consultation_prep: bool = False
+) -> dict:
+    """
+    Build a templated patient brief straight from the stored profile.
+
+    Args:
+        patient_identifier: Either patient ID (number) or patient name (string)
+        consultation_prep: Add key points and suggested questions
+
+    Returns:
+        Dictionary with the brief sections and markdown text, or error message
+    """
+    result = await get_patient_brief(patient_identifier)
+    if result["status"] != "success":
+        return result
+    rendered = render_patient_brief(
+        result["patient_brief"], consultation_prep=consultation_prep
+    )
+    return {
+        "status": "success",
+        "patient_id": result["patient_brief"]["patient_info"]["patient_id"],
+        "brief": rendered["sections"],
+        "text": rendered["text"],
+    }
+
+
+async def add_consultation_notes(
     patient_identifier: str, doctor_name: str, notes: str
 ) -> dict:
     """
@@ -57,27 +339,13 @@ def add_consultation_notes(
         Dictionary with success status and message
     """
     try:
-        # Try to parse as patient ID first
-        try:
-            patient_id = int(patient_identifier)
-            # Verify patient exists
-            if not patient_memory.get_patient_profile(patient_id):
-                return {
-                    "status": "error",
-                    "message": f"Patient not found: {patient_identifier}",
-                }
-        except ValueError:
-            # If not a number, search by name to get ID
-            patient_info = patient_memory.get_patient_by_name(patient_identifier)
-            if patient_info:
-                patient_id = patient_info["patient_id"]
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Patient not found: {patient_identifier}",
-                }
+        patient_id, error = await patient_resolver.resolve(patient_identifier)
+        if error:
+            return error
 
-        success = patient_memory.add_consultation_note(patient_id, doctor_name, notes)
+        success = await async_patient_memory.add_consultation_note(
+            patient_id, doctor_name, notes
+        )
 
         if success:
             return {
@@ -94,22 +362,190 @@ def add_consultation_notes(
         }
 
 
-def list_recent_patients() -> dict:
+async def list_recent_patients(limit: int = 10, cursor: str = "") -> dict:
     """
     Get list of recent patients ordered by last consultation date.
 
+    Args:
+        limit: Maximum number of patients to return
+        cursor: next_cursor from a previous call to get the following page
+
     Returns:
-        Dictionary with list of recent patients
+        Dictionary with list of recent patients and next_cursor (None on the
+        last page)
     """
     try:
-        patients = patient_memory.list_recent_patients(limit=10)
-        return {"status": "success", "recent_patients": patients}
+        result = await async_patient_memory.list_patients_page(limit, cursor or None)
+        return {
+            "status": "success",
+            "recent_patients": result["patients"],
+            "next_cursor": result["next_cursor"],
+        }
 
     except Exception as e:
         return {"status": "error", "message": f"Error listing patients: {str(e)}"}
 
 
-def update_patient_memory(
+async def get_patient_records(
+    patient_identifier: str,
+    record_type: str = "consultations",
+    limit: int = 20,
+    cursor: str = "",
+) -> dict:
+    """
+    Page through a patient's records, newest first.
+
+    Patient briefs only include the most recent consultations; use this to
+    read older ones (pass the brief's consultations_next_cursor as cursor).
+
+    Args:
+        patient_identifier: Either patient ID (number) or patient name (string)
+        record_type: "consultations", "medications", "allergies" or "preferences"
+        limit: Maximum number of records to return
+        cursor: next_cursor from a previous call to get the following page
+
+    Returns:
+        Dictionary with the records page and next_cursor (None on the last page)
+    """
+    # Accept the singular memory types too ("consultation" -> "consultations")
+    collection_name = RECORD_BUILDERS.get(record_type, (record_type,))[0]
+    try:
+        patient_id, error = await patient_resolver.resolve(patient_identifier)
+        if error:
+            return {**error, "record_type": record_type}
+
+        result = await async_patient_memory.get_patient_records(
+            patient_id, collection_name, limit, cursor or None
+        )
+        return {
+            "status": "success",
+            "patient_id": patient_id,
+            "record_type": collection_name,
+            "items": result["items"],
+            "next_cursor": result["next_cursor"],
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "record_type": record_type,
+            "message": f"Error retrieving {record_type}: {str(e)}",
+        }
+
+
+def _parse_memory_update(
+    memory_type: str, content: str, additional_details: str = ""
+) -> tuple:
+    """
+    Turn a free-form memory update into a PatientMemory batch update.
+
+    Returns:
+        (update dict, description) or (None, None) for an unknown memory type
+    """
+    additional_details = additional_details or ""
+    memory_type_lower = memory_type.lower()
+
+    if (
+        "medic" in memory_type_lower
+        or "drug" in memory_type_lower
+        or "prescription" in memory_type_lower
+    ):
+        return {"type": "medication", "medication": content}, "medication"
+
+    elif "allerg" in memory_type_lower or "reaction" in memory_type_lower:
+        # Parse severity from additional details if provided
+        severity = "moderate"  # default
+        if additional_details:
+            if (
+                "severe" in additional_details.lower()
+                or "serious" in additional_details.lower()
+            ):
+                severity = "severe"
+            elif (
+                "mild" in additional_details.lower()
+                or "minor" in additional_details.lower()
+            ):
+                severity = "mild"
+
+        return {
+            "type": "allergy",
+            "allergen": content,
+            "severity": severity,
+            "notes": additional_details,
+        }, "allergy"
+
+    elif (
+        "prefer" in memory_type_lower
+        or "like" in memory_type_lower
+        or "want" in memory_type_lower
+    ):
+        # Determine category from content or details
+        category = "general"
+        if "appointment" in content.lower() or "scheduling" in content.lower():
+            category = "scheduling"
+        elif "communicat" in content.lower() or "contact" in content.lower():
+            category = "communication"
+        elif "treatment" in content.lower() or "care" in content.lower():
+            category = "treatment"
+
+        return {
+            "type": "preference",
+            "category": category,
+            "preference": content,
+            "notes": additional_details,
+        }, "preference"
+
+    elif (
+        "consult" in memory_type_lower
+        or "note" in memory_type_lower
+        or "visit" in memory_type_lower
+    ):
+        # This is a consultation note
+        doctor_name = additional_details if additional_details else "Dr. Unknown"
+        return {
+            "type": "consultation",
+            "doctor": doctor_name,
+            "notes": content,
+        }, "consultation note"
+
+    return None, None
+
+
+async def search_patients(name: str, limit: int = 5, offset: int = 0) -> dict:
+    """
+    Search patients by name, best match first.
+
+    Use this when a name could refer to more than one patient, to list the
+    candidates and ask the doctor which one they mean.
+
+    Args:
+        name: Full or partial patient name; tolerant of typos, accents and punctuation
+        limit: Maximum number of candidates to return
+        offset: Number of candidates to skip, for paging
+
+    Returns:
+        Dictionary with total match count, ranked results and next_offset
+    """
+    try:
+        matches = await async_patient_memory.search_patients(name, limit, offset)
+        next_offset = offset + limit
+        return {
+            "status": "success",
+            "query": name,
+            "total": matches["total"],
+            "results": matches["results"],
+            "next_offset": next_offset if next_offset < matches["total"] else None,
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "query": name,
+            "message": f"Error searching patients: {str(e)}",
+        }
+
+
+async def update_patient_memory(
     patient_identifier: str,
     memory_type: str,
     content: str,
@@ -128,88 +564,24 @@ def update_patient_memory(
         Dictionary with success status and message
     """
     try:
-        # Get patient ID
-        try:
-            patient_id = int(patient_identifier)
-        except ValueError:
-            patient_info = patient_memory.get_patient_by_name(patient_identifier)
-            if patient_info:
-                patient_id = patient_info["patient_id"]
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Patient not found: {patient_identifier}",
-                }
-
-        # Route to appropriate update method based on memory type
-        memory_type_lower = memory_type.lower()
-
-        if (
-            "medic" in memory_type_lower
-            or "drug" in memory_type_lower
-            or "prescription" in memory_type_lower
-        ):
-            success = patient_memory.add_medication(patient_id, content)
-            memory_desc = "medication"
-
-        elif "allerg" in memory_type_lower or "reaction" in memory_type_lower:
-            # Parse severity from additional details if provided
-            severity = "moderate"  # default
-            if additional_details:
-                if (
-                    "severe" in additional_details.lower()
-                    or "serious" in additional_details.lower()
-                ):
-                    severity = "severe"
-                elif (
-                    "mild" in additional_details.lower()
-                    or "minor" in additional_details.lower()
-                ):
-                    severity = "mild"
-
-            success = patient_memory.add_allergy(
-                patient_id, content, severity, additional_details
-            )
-            memory_desc = "allergy"
-
-        elif (
-            "prefer" in memory_type_lower
-            or "like" in memory_type_lower
-            or "want" in memory_type_lower
-        ):
-            # Determine category from content or details
-            category = "general"
-            if "appointment" in content.lower() or "scheduling" in content.lower():
-                category = "scheduling"
-            elif "communicat" in content.lower() or "contact" in content.lower():
-                category = "communication"
-            elif "treatment" in content.lower() or "care" in content.lower():
-                category = "treatment"
-
-            success = patient_memory.add_preference(
-                patient_id, category, content, additional_details
-            )
-            memory_desc = "preference"
-
-        elif (
-            "consult" in memory_type_lower
-            or "note" in memory_type_lower
-            or "visit" in memory_type_lower
-        ):
-            # This is a consultation note
-            doctor_name = additional_details if additional_details else "Dr. Unknown"
-            success = patient_memory.add_consultation_note(
-                patient_id, doctor_name, content
-            )
-            memory_desc = "consultation note"
-
-        else:
+        patient_id, error = await patient_resolver.resolve(patient_identifier)
+        if error:
+            return error
+
+        update, memory_desc = _parse_memory_update(
+            memory_type, content, additional_details
+        )
+        if not update:
             return {
                 "status": "error",
                 "message": f"Unknown memory type: {memory_type}. Use 'medication', 'allergy', 'preference', or 'consultation'.",
             }
 
-        if success:
+        result = await async_patient_memory.apply_updates(
+            patient_id, [update], validate=False
+        )
+
+        if result["status"] == "success":
             return {
                 "status": "success",
                 "message": f"Successfully added {memory_desc} for patient {patient_id}",
@@ -222,3 +594,56 @@ def update_patient_memory(
             "status": "error",
             "message": f"Error updating patient memory: {str(e)}",
         }
+
+
+async def record_patient_visit(
+    patient_identifier: str, updates: List[MemoryUpdateRequest]
+) -> dict:
+    """
+    Record several memory updates from one visit in a single call.
+
+    Use this instead of repeated update_patient_memory calls when a
+    consultation produces more than one update, e.g. a note, two
+    prescriptions and a new allergy.
+
+    Args:
+        patient_identifier: Either patient ID (number) or patient name (string)
+        updates: List of updates, each with memory_type ("medication", "allergy", "preference" or "consultation"), content and optional additional_details
+
+    Returns:
+        Dictionary with overall status, message and a per-update results list
+    """
+    try:
+        patient_id, error = await patient_resolver.resolve(patient_identifier)
+        if error:
+            return error
+
+        batch = []
+        descriptions = []
+        for item in updates:
+            if isinstance(item, dict):
+                item = MemoryUpdateRequest(**item)
+            update, memory_desc = _parse_memory_update(
+                item.memory_type, item.content, item.additional_details
+            )
+            # Unknown types are passed through so they get a per-item error
+            batch.append(update or {"type": item.memory_type})
+            descriptions.append(memory_desc or item.memory_type)
+
+        result = await async_patient_memory.apply_updates(
+            patient_id, batch, validate=False
+        )
+        for item_result, memory_desc in zip(result["results"], descriptions):
+            item_result["type"] = memory_desc
+
+        return {
+            "status": result["status"],
+            "message": f"{result['message']} for patient {patient_id}",
+            "results": result["results"],
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error recording patient visit: {str(e)}",
+        }
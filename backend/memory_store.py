@@ -0,0 +1,250 @@
+import heapq
+import threading
+import time
+
+from name_search import NameIndex
+
+from records import (
+    ID_FIELDS,
+    PROFILE_COLLECTIONS,
+    PROFILE_SECTIONS,
+    allergy_record,
+    batch_summary,
+    consultation_record,
+    decode_cursor,
+    medication_record,
+    page,
+    preference_record,
+    prepare_batch,
+    profile_projection,
+    project_profile,
+    sort_key,
+)
+from patient_store import PatientStore
+
+
+class InMemoryPatientMemory(PatientStore):
+    """
+    In-process stand-in for PatientMemory with the same methods and results.
+
+    Documents live in per-patient dict indexes, so profile reads and writes
+    cost a few dict lookups with no network involved. Used for offline
+    benchmarks and tests.
+    """
+
+    def __init__(self, profile_consultations: int = 10):
+        self.profile_consultations = profile_consultations
+        self._lock = threading.RLock()
+        self._patients = {}  # patient_id -> patient doc
+        # collection name -> patient_id -> doc_id -> doc
+        self._records = {name: {} for name in PROFILE_COLLECTIONS}
+        self._last_seen = {}  # patient_id -> latest consultation date
+        self.name_index = NameIndex()
+
+    def load(self, documents) -> int:
+        """Bulk-load (collection_name, document) pairs; returns the count"""
+        count = 0
+        with self._lock:
+            for collection_name, document in documents:
+                self._store(collection_name, document)
+                count += 1
+        return count
+
+    def _store(self, collection_name: str, document: dict):
+        patient_id = document["patient_id"]
+        if collection_name == "patients":
+            document = dict(document)
+            if patient_id in self._last_seen:
+                document["last_seen"] = self._last_seen[patient_id]
+            self._patients[patient_id] = document
+            self.name_index.add(patient_id, document.get("name", ""))
+            return
+
+        doc_id = document[ID_FIELDS[collection_name]]
+        self._records[collection_name].setdefault(patient_id, {})[doc_id] = document
+        if collection_name == "consultations":
+            date = document.get("date")
+            if date and date > self._last_seen.get(patient_id, ""):
+                # Mirrors the last_seen field PatientMemory keeps on the
+                # patient document
+                self._last_seen[patient_id] = date
+                if patient_id in self._patients:
+                    self._patients[patient_id]["last_seen"] = date
+
+    def get_patient_profile(
+        self, patient_id: int, fields: str = None, view: str = None
+    ) -> dict:
+        """Get a patient profile, optionally reduced to some sections/fields"""
+        projection = profile_projection(fields, view)
+        with self._lock:
+            patient_doc = self._patients.get(patient_id)
+            if patient_doc is None:
+                return None
+
+            # Only the requested sections are copied and sorted
+            sections = projection or PROFILE_SECTIONS
+            profile = {"patient_info": dict(patient_doc)}
+            for name in PROFILE_COLLECTIONS:
+                if name in sections:
+                    profile[name] = [
+                        dict(doc) for doc in self._ordered(name, patient_id)
+                    ]
+
+        if "consultations" in profile:
+            recent = page(
+                profile["consultations"],
+                self.profile_consultations,
+                lambda doc: sort_key("consultations", doc),
+            )
+            profile["consultations"] = recent["items"]
+            profile["consultations_next_cursor"] = recent["next_cursor"]
+        return project_profile(profile, projection)
+
+    def _ordered(self, collection_name: str, patient_id: int, after=None) -> list:
+        """A patient's documents in page order, optionally after a sort key"""
+        docs = self._records[collection_name].get(patient_id, {}).values()
+        if after is not None:
+            docs = [d for d in docs if sort_key(collection_name, d) < after]
+        return sorted(docs, key=lambda d: sort_key(collection_name, d), reverse=True)
+
+    def get_patient_records(
+        self, patient_id: int, collection_name: str, limit: int = 20, cursor=None
+    ) -> dict:
+        """Get one page of a patient's documents from a collection, newest first"""
+        if collection_name not in PROFILE_COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection_name}")
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            docs = self._ordered(collection_name, patient_id, after)[: limit + 1]
+            docs = [dict(doc) for doc in docs]
+        return page(docs, limit, lambda doc: sort_key(collection_name, doc))
+
+    def patient_exists(self, patient_id: int) -> bool:
+        """Check that a patient exists"""
+        with self._lock:
+            return patient_id in self._patients
+
+    def search_patients(self, query: str, limit: int = 10, offset: int = 0) -> dict:
+        """Ranked, typo-tolerant patient name search"""
+        return self.name_index.search(query, limit, offset)
+
+    def get_patient_by_name(self, name: str) -> dict:
+        """Find the best-ranked patient for a name"""
+        matches = self.name_index.search(name, limit=1)["results"]
+        if not matches:
+            return None
+        with self._lock:
+            patient_doc = self._patients.get(matches[0]["patient_id"])
+            return dict(patient_doc) if patient_doc else None
+
+    def name_index_version(self) -> int:
+        """Counter that changes whenever a patient is created or renamed"""
+        return self.name_index.version
+
+    def _add(self, collection_name: str, document: dict) -> bool:
+        with self._lock:
+            if document["patient_id"] not in self._patients:
+                return False
+            self._store(collection_name, document)
+            return True
+
+    def add_consultation_note(self, patient_id: int, doctor: str, notes: str) -> bool:
+        """Add a new consultation note for a patient"""
+        return self._add(
+            "consultations", consultation_record(patient_id, doctor, notes)
+        )
+
+    def add_medication(
+        self,
+        patient_id: int,
+        medication: str,
+        prescribed_date: str = None,
+        status: str = "active",
+    ) -> bool:
+        """Add a new medication for a patient"""
+        return self._add(
+            "medications",
+            medication_record(patient_id, medication, prescribed_date, status),
+        )
+
+    def add_allergy(
+        self,
+        patient_id: int,
+        allergen: str,
+        severity: str = "moderate",
+        notes: str = "",
+    ) -> bool:
+        """Add a new allergy for a patient"""
+        return self._add(
+            "allergies", allergy_record(patient_id, allergen, severity, notes)
+        )
+
+    def add_preference(
+        self, patient_id: int, category: str, preference: str, notes: str = ""
+    ) -> bool:
+        """Add a new preference for a patient"""
+        return self._add(
+            "preferences", preference_record(patient_id, category, preference, notes)
+        )
+
+    def apply_updates(
+        self, patient_id: int, updates: list, validate: bool = True
+    ) -> dict:
+        """Write a batch of memory updates for one patient"""
+        if validate and not self.patient_exists(patient_id):
+            return {
+                "status": "error",
+                "message": f"Patient not found: {patient_id}",
+                "results": [],
+            }
+
+        results, batches = prepare_batch(patient_id, updates)
+        with self._lock:
+            for collection_name, batch in batches.items():
+                for index, document in batch.values():
+                    self._store(collection_name, document)
+                    results[index]["success"] = True
+
+        return batch_summary(results)
+
+    def cache_stats(self) -> dict:
+        """Size of the in-process name index"""
+        return {
+            "name_index": {
+                "size": len(self.name_index),
+                "version": self.name_index.version,
+            }
+        }
+
+    def ping(self) -> dict:
+        """Time taking the store lock, the only shared resource"""
+        start = time.perf_counter()
+        with self._lock:
+            pass
+        return {"memory_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    def list_patients_page(self, limit: int = 10, cursor=None) -> dict:
+        """Get one page of patients ordered by most recent consultation"""
+        after = decode_cursor(cursor, (str, int)) if cursor else None
+        with self._lock:
+            # Same order as PatientMemory: last_seen, then patient_id, both
+            # descending, with patients never seen last
+            keys = (
+                (self._last_seen.get(patient_id, ""), patient_id)
+                for patient_id in self._patients
+            )
+            if after is not None:
+                keys = (key for key in keys if key < after)
+            rows = [
+                {
+                    "patient_id": patient_id,
+                    "name": self._patients[patient_id].get("name"),
+                    "last_seen": last_seen or None,
+                }
+                for last_seen, patient_id in heapq.nlargest(limit + 1, keys)
+            ]
+
+        result = page(
+            rows, limit, lambda row: (row["last_seen"] or "", row["patient_id"])
+        )
+        return {"patients": result["items"], "next_cursor": result["next_cursor"]}
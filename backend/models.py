@@ -1,5 +1,5 @@
-from typing import List, Optional, Any, Dict
-from pydantic import BaseModel
+from typing import List, Optional, Any, Dict, Union
+from pydantic import BaseModel, model_serializer
 from datetime import datetime
 
 # Request models
@@ -16,6 +16,12 @@ class MemoryUpdateRequest(BaseModel):
     content: str
     additional_details: Optional[str] = ""
 
+class MemoryBatchRequest(BaseModel):
+    updates: List[MemoryUpdateRequest]
+
+class BriefWarmRequest(BaseModel):
+    patient_ids: List[Union[int, str]]  # IDs or names of upcoming patients
+
 # Response models
 class PatientInfo(BaseModel):
     patient_id: int
@@ -23,6 +29,7 @@ class PatientInfo(BaseModel):
     date_of_birth: Optional[str] = None
     created_at: Optional[str] = None
     last_updated: Optional[str] = None
+    last_seen: Optional[str] = None
     medical_history: Optional[List[str]] = []
 
 class Consultation(BaseModel):
@@ -63,12 +70,35 @@ class PatientProfile(BaseModel):
     medications: List[Medication]
     allergies: List[Allergy]
     preferences: List[Preference]
+    # Set when older consultations than those embedded exist; pass it to
+    # GET /patients/{id}/records/consultations?cursor=...
+    consultations_next_cursor: Optional[str] = None
+
+class PatientProfileView(BaseModel):
+    """Profile reduced to the sections/fields of a view or fields= request"""
+    patient_info: Optional[Dict[str, Any]] = None
+    consultations: Optional[List[Dict[str, Any]]] = None
+    medications: Optional[List[Dict[str, Any]]] = None
+    allergies: Optional[List[Dict[str, Any]]] = None
+    preferences: Optional[List[Dict[str, Any]]] = None
+    consultations_next_cursor: Optional[str] = None
+
+    @model_serializer(mode="wrap")
+    def _only_requested_sections(self, handler):
+        # Sections the view or fields= left out are omitted, not sent as null
+        data = handler(self)
+        return {key: value for key, value in data.items() if key in self.model_fields_set}
 
 class RecentPatient(BaseModel):
     patient_id: int
     name: str
     last_seen: Optional[str] = None
 
+class PatientSearchResult(BaseModel):
+    patient_id: int
+    name: str
+    score: float
+
 class APIResponse(BaseModel):
     status: str
     message: Optional[str] = None
@@ -77,13 +107,32 @@ class APIResponse(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     timestamp: str
+    # Structured sections of a templated patient brief
+    brief: Optional[Dict[str, Any]] = None
 
 class PatientBriefResponse(BaseModel):
     status: str
-    patient_brief: Optional[PatientProfile] = None
+    patient_brief: Optional[Union[PatientProfile, PatientProfileView]] = None
+    message: Optional[str] = None
+
+class PatientSearchResponse(BaseModel):
+    status: str
+    query: str
+    total: int = 0
+    results: List[PatientSearchResult] = []
+    next_offset: Optional[int] = None
     message: Optional[str] = None
 
 class RecentPatientsResponse(BaseModel):
     status: str
     recent_patients: Optional[List[RecentPatient]] = None
+    next_cursor: Optional[str] = None
+    message: Optional[str] = None
+
+class PatientRecordsResponse(BaseModel):
+    status: str
+    patient_id: Optional[int] = None
+    record_type: str
+    items: List[Dict[str, Any]] = []
+    next_cursor: Optional[str] = None
     message: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+In-process patient name index with ranked, typo-tolerant search.
+
+Names are accent-folded and punctuation-insensitive, so "O'Sullivan",
+"O Sullivan" and "o'sullivan" all match, and "Sean" finds "Seán". Candidates
+come from a trigram inverted index and are ranked exact match > prefix >
+substring > fuzzy (trigram similarity), so lookups stay fast at 100k+
+patients.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+# Fuzzy matches below this similarity are not returned
+MIN_SCORE = 0.3
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> list:
+    """Accent-fold, lowercase and split a name into alphanumeric tokens"""
+    folded = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(c for c in folded if not unicodedata.combining(c)).lower()
+    # Apostrophes join rather than split, so O'Sullivan -> osullivan
+    folded = folded.replace("'", "").replace("’", "")
+    return [token for token in _NON_ALNUM.split(folded) if token]
+
+
+def _trigrams(term: str, closed: bool = True) -> set:
+    """Trigrams of a start-padded term; closed terms are end-padded too"""
+    padded = f"$${term}$" if closed else f"$${term}"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a: set, b: set) -> float:
+    """Dice coefficient of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class _Entry:
+    __slots__ = (
+        "patient_id",
+        "name",
+        "tokens",
+        "compact",
+        "compact_trigrams",
+        "token_trigrams",
+        "trigrams",
+    )
+
+    def __init__(self, patient_id, name):
+        self.patient_id = patient_id
+        self.name = name
+        self.tokens = normalize_name(name)
+        self.compact = "".join(self.tokens)
+        self.compact_trigrams = _trigrams(self.compact)
+        self.token_trigrams = [_trigrams(token) for token in self.tokens]
+        self.trigrams = self.compact_trigrams.union(*self.token_trigrams)
+
+
+class NameIndex:
+    """Thread-safe trigram index from patient names to patient IDs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # patient_id -> _Entry
+        self._postings = {}  # trigram -> set of patient_ids
+        # Bumped whenever a name is added, changed or removed, so callers
+        # caching name lookups can tell their entries are stale
+        self.version = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def add(self, patient_id, name: str):
+        """Index (or re-index) a patient's name"""
+        with self._lock:
+            current = self._entries.get(patient_id)
+            if current is not None and current.name == name:
+                return
+            self._add(_Entry(patient_id, name))
+            self.version += 1
+
+    def remove(self, patient_id):
+        with self._lock:
+            if self._remove(patient_id):
+                self.version += 1
+
+    def _add(self, entry):
+        self._remove(entry.patient_id)
+        self._entries[entry.patient_id] = entry
+        for trigram in entry.trigrams:
+            self._postings.setdefault(trigram, set()).add(entry.patient_id)
+
+    def _remove(self, patient_id) -> bool:
+        entry = self._entries.pop(patient_id, None)
+        if entry is None:
+            return False
+        for trigram in entry.trigrams:
+            postings = self._postings.get(trigram)
+            if postings is not None:
+                postings.discard(patient_id)
+                if not postings:
+                    del self._postings[trigram]
+        return True
+
+    def rebuild(self, patients):
+        """Replace the index contents with (patient_id, name) pairs"""
+        fresh = NameIndex()
+        for patient_id, name in patients:
+            fresh.add(patient_id, name)
+        with self._lock:
+            changed = {pid: e.name for pid, e in fresh._entries.items()} != {
+                pid: e.name for pid, e in self._entries.items()
+            }
+            self._entries = fresh._entries
+            self._postings = fresh._postings
+            if changed:
+                self.version += 1
+
+    @staticmethod
+    def _score(query_tokens, query_compact, query_trigrams, entry) -> float:
+        # query_trigrams is (whole-query trigrams, per-token trigrams)
+        if query_compact == entry.compact:
+            return 1.0
+        if entry.compact.startswith(query_compact):
+            return 0.95
+        # Prefix of a run of tokens, ignoring where the query splits words
+        # (so "O Sullivan" and "O'Sullivan" rank the same), or every query
+        # word prefixing some name word in any order
+        tokens = entry.tokens
+        if any(
+            "".join(tokens[i:]).startswith(query_compact) for i in range(len(tokens))
+        ) or all(any(token.startswith(q) for token in tokens) for q in query_tokens):
+            return 0.9
+        if query_compact in entry.compact:
+            return 0.8
+
+        # Typo tolerance: best of whole-name and per-token similarity
+        whole_trigrams, token_trigrams = query_trigrams
+        whole = _similarity(whole_trigrams, entry.compact_trigrams)
+        per_token = sum(
+            max((_similarity(q, t) for t in entry.token_trigrams), default=0.0)
+            for q in token_trigrams
+        ) / len(token_trigrams)
+        return 0.75 * max(whole, per_token)
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> dict:
+        """
+        Rank patients whose names match query.
+
+        Returns:
+            Dict with "total" matches and the "results" page, each result
+            holding patient_id, name and a 0-1 score
+        """
+        query_tokens = normalize_name(query)
+        if not query_tokens:
+            return {"total": 0, "results": []}
+        query_compact = "".join(query_tokens)
+        query_trigrams = (
+            _trigrams(query_compact),
+            [_trigrams(token) for token in query_tokens],
+        )
+
+        # Open-ended trigrams so a partial query still hits prefix postings
+        open_trigrams = [_trigrams(token, closed=False) for token in query_tokens]
+        lookup = _trigrams(query_compact, closed=False).union(*open_trigrams)
+        # Prefix/substring matches and plausible typos share a good fraction
+        # of the query's trigrams; skip weaker candidates instead of scoring
+        # every name that merely shares a first name or leading letter
+        min_shared = max(1, int(0.4 * len(lookup)))
+
+        with self._lock:
+            counts = Counter()
+            for trigram in lookup:
+                counts.update(self._postings.get(trigram, ()))
+            entries = [
+                self._entries[patient_id]
+                for patient_id, shared in counts.items()
+                if shared >= min_shared
+            ]
+
+        matches = []
+        for entry in entries:
+            score = self._score(query_tokens, query_compact, query_trigrams, entry)
+            if score >= MIN_SCORE:
+                matches.append((score, entry))
+        matches.sort(key=lambda match: (-match[0], match[1].name, match[1].patient_id))
+
+        page = matches[offset : offset + limit]
+        return {
+            "total": len(matches),
+            "results": [
+                {
+                    "patient_id": entry.patient_id,
+                    "name": entry.name,
+                    "score": round(score, 3),
+                }
+                for score, entry in page
+            ],
+        }
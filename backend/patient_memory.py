@@ -1,15 +1,47 @@
-import os
-from datetime import datetime
-from dotenv import load_dotenv
+import copy
+import threading
+import time
+import couchbase.subdocument as SD
 from couchbase.cluster import Cluster
-from couchbase.options import ClusterOptions
+from couchbase.options import ClusterOptions, QueryOptions
 from couchbase.auth import PasswordAuthenticator
-from couchbase.exceptions import DocumentNotFoundException
 
-load_dotenv()
+from cache import LRUCache
+from name_search import NameIndex
+from records import (
+    ID_FIELDS,
+    PROFILE_COLLECTIONS,
+    PROFILE_VIEWS,
+    SORT_FIELDS,
+    allergy_record,
+    batch_summary,
+    consultation_record,
+    decode_cursor,
+    medication_record,
+    page,
+    preference_record,
+    prepare_batch,
+    profile_projection,
+    project_profile,
+    sort_key,
+)
+from patient_store import PatientStore
+
+
+def run_mutation(cluster, statement: str) -> int:
+    """
+    Run a N1QL mutation and return the number of documents it changed.
 
+    The SDK only asks for query metrics when told to, so they are requested
+    explicitly; a response without them counts as no documents changed.
+    """
+    result = cluster.query(statement, QueryOptions(metrics=True))
+    list(result)
+    metrics = result.metadata().metrics()
+    return metrics.mutation_count() if metrics is not None else 0
 
-class PatientMemory:
+
+class PatientMemory(PatientStore):
     def __init__(
         self,
         conn_str,
@@ -17,6 +49,10 @@ class PatientMemory:
         password,
         bucket_name,
         scope_name="medicai",
+        profile_cache_size=1024,
+        profile_cache_ttl=300,
+        name_index_ttl=300,
+        profile_consultations=10,
     ):
         self.cluster = Cluster(
             conn_str, ClusterOptions(PasswordAuthenticator(username, password))
@@ -30,78 +66,381 @@ class PatientMemory:
             "allergies": self.scope.collection("allergies"),
             "preferences": self.scope.collection("preferences"),
         }
+        # Read-through cache of full profiles keyed by patient doc key; every
+        # write drops the patient's entry and bumps its generation so reads
+        # that overlap a write never put a stale profile back.
+        self.profile_cache = LRUCache(
+            max_size=profile_cache_size, ttl=profile_cache_ttl
+        )
+        # Per-patient write generations (plus an epoch bumped when the whole
+        # cache is cleared): a read only caches its profile if no write to
+        # the patient landed while its query was running
+        self._profile_generations = {}
+        self._profile_epoch = 0
+        self._profile_lock = threading.Lock()
+        # In-process name index, rebuilt from the patients collection once it
+        # is older than name_index_ttl seconds
+        self.name_index = NameIndex()
+        self.name_index_ttl = name_index_ttl
+        self._name_index_built_at = None
+        self._name_index_lock = threading.Lock()
+        # Profiles embed only this many recent consultations; the rest are
+        # paged with get_patient_records
+        self.profile_consultations = profile_consultations
         print("[Memory System] Connected to Couchbase medical database")
 
-    def get_patient_profile(self, patient_id: int) -> dict:
-        """Get complete patient profile from all collections"""
-        try:
-            # Get basic patient info
-            patient_doc = (
-                self.collections["patients"].get(str(patient_id)).content_as[dict]
-            )
-
-            # Get related data from other collections
-            profile = {
-                "patient_info": patient_doc,
-                "consultations": self._get_patient_data("consultations", patient_id),
-                "medications": self._get_patient_data("medications", patient_id),
-                "allergies": self._get_patient_data("allergies", patient_id),
-                "preferences": self._get_patient_data("preferences", patient_id),
-            }
+    def _keyspace(self, collection_name: str) -> str:
+        """Fully qualified keyspace path for a collection in the medicai scope"""
+        return f"`{self.bucket.name}`.{self.scope.name}.{collection_name}"
 
-            print(
-                f"[Memory System] Retrieved complete profile for patient {patient_id}"
+    def _order_key(self, collection_name: str, alias: str = "x") -> str:
+        """Page-order expression; matches the idx_<collection>_patient_order keys"""
+        return f'IFMISSINGORNULL({alias}.{SORT_FIELDS[collection_name]}, "")'
+
+    def _order_by(self, collection_name: str) -> str:
+        return (
+            f"ORDER BY {self._order_key(collection_name)} DESC, "
+            f"x.{ID_FIELDS[collection_name]} DESC"
+        )
+
+    @staticmethod
+    def _projection(alias: str, fields) -> str:
+        """SQL++ expression for a document reduced to fields (None = whole)"""
+        if fields is None:
+            return alias
+        return "{" + ", ".join(f'"{f}": {alias}.`{f}`' for f in fields) + "}"
+
+    def _profile_query(self, projection: dict = None) -> str:
+        """Single-round-trip profile statement
+
+        ($1 = doc key, $2 = patient_id, $3 = consultations to embed + 1)
+
+        Args:
+            projection: records.profile_projection result; None selects the
+                full profile
+        """
+        # The patient doc is fetched with USE KEYS and every related
+        # collection is folded in as a subquery, so a brief costs a single
+        # query no matter how many collections make up the profile.
+        # Sections left out of the projection are not queried at all.
+        projection = projection or PROFILE_VIEWS["full"]
+        columns = []
+        if "patient_info" in projection:
+            columns.append(
+                f"{self._projection('p', projection['patient_info'])} AS patient_info"
+            )
+        for name in PROFILE_COLLECTIONS:
+            if name not in projection:
+                continue
+            limit = " LIMIT $3" if name == "consultations" else ""
+            columns.append(
+                f"(SELECT RAW {self._projection('x', projection[name])} "
+                f"FROM {self._keyspace(name)} AS x "
+                f"WHERE x.patient_id = $2 {self._order_by(name)}{limit}) AS {name}"
             )
+        columns = ",\n".join(columns)
+        return f"""
+        SELECT {columns}
+        FROM {self._keyspace("patients")} AS p USE KEYS $1
+        """
+
+    def _records_page_query(self, collection_name: str, after: bool) -> str:
+        """Keyset page of one collection
+
+        ($1 = patient_id, then $2/$3 = cursor sort value/ID if after, then
+        the page size)
+        """
+        key = self._order_key(collection_name)
+        id_field = f"x.{ID_FIELDS[collection_name]}"
+        # The range predicate on key is an index span; the OR only breaks
+        # ties on the boundary value
+        keyset = f"AND {key} <= $2 AND ({key} < $2 OR {id_field} < $3)" if after else ""
+        return f"""
+        SELECT RAW x FROM {self._keyspace(collection_name)} AS x
+        WHERE x.patient_id = $1 {keyset}
+        {self._order_by(collection_name)}
+        LIMIT ${4 if after else 2}
+        """
+
+    def _patient_names_query(self) -> str:
+        return f"""
+        SELECT RAW [p.patient_id, p.name]
+        FROM {self._keyspace("patients")} p
+        WHERE p.patient_id IS NOT MISSING
+        """
+
+    def _patients_page_query(self, after: bool) -> str:
+        """Keyset page of patients, most recently seen first
+
+        ($1/$2 = cursor last_seen/patient_id if after, then the page size)
+        """
+        # Served in order from idx_patients_recent, so the cost is
+        # O(limit) however many consultations there are. Patients never
+        # seen sort last.
+        key = 'IFMISSINGORNULL(p.last_seen, "")'
+        keyset = (
+            f"AND {key} <= $1 AND ({key} < $1 OR p.patient_id < $2)" if after else ""
+        )
+        return f"""
+        SELECT p.patient_id, p.name, {key} AS last_seen
+        FROM {self._keyspace("patients")} p
+        WHERE {key} IS NOT MISSING AND p.patient_id IS NOT MISSING {keyset}
+        ORDER BY {key} DESC, p.patient_id DESC
+        LIMIT ${3 if after else 1}
+        """
+
+    def _backfill_last_seen_query(self) -> str:
+        return f"""
+        UPDATE {self._keyspace("patients")} p
+        SET p.last_seen = (
+            SELECT RAW MAX(c.date)
+            FROM {self._keyspace("consultations")} c
+            WHERE c.patient_id = p.patient_id
+        )[0]
+        WHERE p.patient_id IS NOT MISSING
+        """
+
+    def query_catalog(self) -> list:
+        """Every N1QL statement this class issues, with sample arguments.
+
+        Used by scripts/provision_indexes.py to EXPLAIN each statement and
+        check that none of them falls back to a primary scan.
+        """
+        sample_id = 12345
+        catalog = [
+            (
+                "get_patient_profile",
+                self._profile_query(),
+                [str(sample_id), sample_id, self.profile_consultations + 1],
+            ),
+            (
+                "get_patient_profile[alerts]",
+                self._profile_query(profile_projection(view="alerts")),
+                [str(sample_id), sample_id],
+            ),
+            ("_refresh_name_index", self._patient_names_query(), []),
+            ("list_patients_page", self._patients_page_query(False), [10]),
+            (
+                "list_patients_page[cursor]",
+                self._patients_page_query(True),
+                ["2024-01-01", sample_id, 10],
+            ),
+            ("backfill_last_seen", self._backfill_last_seen_query(), []),
+        ]
+        for name in PROFILE_COLLECTIONS:
+            catalog.append(
+                (
+                    f"get_patient_records[{name}]",
+                    self._records_page_query(name, False),
+                    [sample_id, 20],
+                )
+            )
+            catalog.append(
+                (
+                    f"get_patient_records[{name}, cursor]",
+                    self._records_page_query(name, True),
+                    [sample_id, "2024-01-01", f"{sample_id}_x", 20],
+                )
+            )
+        return catalog
+
+    def get_patient_profile(
+        self, patient_id: int, fields: str = None, view: str = None
+    ) -> dict:
+        """
+        Get a patient profile from all collections in one round trip.
+
+        Args:
+            patient_id: Patient to fetch
+            fields: Comma-separated profile sections to return
+            view: Named view from records.PROFILE_VIEWS, e.g. "summary"
+
+        Returns:
+            Profile dict with the requested sections, or None if the patient
+            does not exist
+
+        Raises:
+            ValueError: If fields or view is invalid
+        """
+        projection = profile_projection(fields, view)
+        # Only full profiles are cached; views of a cached profile are cut
+        # from it, otherwise the projection is pushed into the query
+        cached = self.profile_cache.get(str(patient_id))
+        if cached is not None:
+            # Callers get their own copy, so changing it cannot touch the cache
+            return project_profile(copy.deepcopy(cached), projection)
+
+        generation = self._profile_generation(patient_id)
+        try:
+            query = self._profile_query(projection)
+            limit = self.profile_consultations
+            args = [str(patient_id), patient_id]
+            if projection is None or "consultations" in projection:
+                args.append(limit + 1)
+            rows = list(self.cluster.query(query, *args))
+
+            if not rows:
+                print(f"[Memory System] Patient {patient_id} not found")
+                return None
+
+            profile = rows[0]
+            for name in PROFILE_COLLECTIONS:
+                if projection is None or name in projection:
+                    profile[name] = profile.get(name) or []
+            if "consultations" in profile:
+                recent = page(
+                    profile["consultations"],
+                    limit,
+                    lambda doc: sort_key("consultations", doc),
+                )
+                profile["consultations"] = recent["items"]
+                profile["consultations_next_cursor"] = recent["next_cursor"]
+
+            if projection is None:
+                self._cache_profile(patient_id, generation, copy.deepcopy(profile))
+                print(
+                    f"[Memory System] Retrieved complete profile for patient {patient_id}"
+                )
             return profile
 
-        except DocumentNotFoundException:
-            print(f"[Memory System] Patient {patient_id} not found")
-            return None
         except Exception as e:
             print(f"[Memory System] Error retrieving patient {patient_id}: {e}")
             return None
 
-    def _get_patient_data(self, collection_name: str, patient_id: int) -> list:
-        """Get all documents for a patient from a specific collection"""
+    def _profile_generation(self, patient_id) -> tuple:
+        with self._profile_lock:
+            return (
+                self._profile_epoch,
+                self._profile_generations.get(str(patient_id), 0),
+            )
+
+    def _cache_profile(self, patient_id, generation: tuple, profile: dict):
+        """Cache a profile read at generation, unless a write has landed since"""
+        with self._profile_lock:
+            current = (
+                self._profile_epoch,
+                self._profile_generations.get(str(patient_id), 0),
+            )
+            if current == generation:
+                self.profile_cache.set(str(patient_id), profile)
+
+    def _invalidate_profile(self, patient_id):
+        """Drop a patient's cached profile and fence off reads in flight"""
+        key = str(patient_id)
+        with self._profile_lock:
+            self._profile_generations[key] = self._profile_generations.get(key, 0) + 1
+            self.profile_cache.invalidate(key)
+
+    def patient_exists(self, patient_id: int) -> bool:
+        """Check that a patient doc exists with a single KV round trip"""
+        # A cached profile answers it, without counting as a profile read
+        if str(patient_id) in self.profile_cache:
+            return True
         try:
-            query = f"SELECT * FROM `{self.bucket.name}`.{self.scope.name}.{collection_name} WHERE patient_id = $1"
-            result = self.cluster.query(query, patient_id)
-            return [row[collection_name] for row in result]
+            return self.collections["patients"].exists(str(patient_id)).exists
+        except Exception as e:
+            print(f"[Memory System] Error checking patient {patient_id}: {e}")
+            return False
+
+    def get_patient_records(
+        self, patient_id: int, collection_name: str, limit: int = 20, cursor=None
+    ) -> dict:
+        """
+        Get one page of a patient's documents from a collection, newest first.
+
+        Args:
+            patient_id: Patient whose documents to list
+            collection_name: One of PROFILE_COLLECTIONS
+            limit: Maximum number of documents to return
+            cursor: next_cursor from the previous page, or None for the first
+
+        Returns:
+            Dict with the "items" page and "next_cursor" (None on the last page)
+
+        Raises:
+            ValueError: If the collection or cursor is invalid
+        """
+        if collection_name not in PROFILE_COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection_name}")
+        after = decode_cursor(cursor) if cursor else None
+
+        try:
+            query = self._records_page_query(collection_name, after is not None)
+            args = [patient_id, *(after or ()), limit + 1]
+            items = list(self.cluster.query(query, *args))
         except Exception as e:
             print(
                 f"[Memory System] Error querying {collection_name} for patient {patient_id}: {e}"
             )
-            return []
+            return {"items": [], "next_cursor": None}
+
+        return page(items, limit, lambda doc: sort_key(collection_name, doc))
+
+    def _refresh_name_index(self):
+        """Rebuild the name index if it has never been built or is stale"""
+        now = time.monotonic()
+        built_at = self._name_index_built_at
+        if built_at is not None and now - built_at < self.name_index_ttl:
+            return
+
+        with self._name_index_lock:
+            if self._name_index_built_at != built_at:
+                return  # Another thread rebuilt it while we waited
+            rows = self.cluster.query(self._patient_names_query())
+            self.name_index.rebuild((row[0], row[1]) for row in rows)
+            self._name_index_built_at = time.monotonic()
+            print(
+                f"[Memory System] Indexed {len(self.name_index)} patient names "
+                f"in {(self._name_index_built_at - now) * 1000:.0f}ms"
+            )
+
+    def search_patients(self, query: str, limit: int = 10, offset: int = 0) -> dict:
+        """Ranked, typo-tolerant patient name search"""
+        try:
+            self._refresh_name_index()
+            return self.name_index.search(query, limit, offset)
+        except Exception as e:
+            print(f"[Memory System] Error searching for patient '{query}': {e}")
+            return {"total": 0, "results": []}
 
     def get_patient_by_name(self, name: str) -> dict:
-        """Find patient by name (for CLI convenience)"""
+        """Find the best-ranked patient for a name (for CLI convenience)"""
         try:
-            query = f"SELECT * FROM `{self.bucket.name}`.{self.scope.name}.patients WHERE LOWER(name) LIKE LOWER($1)"
-            result = self.cluster.query(query, f"%{name}%")
+            matches = self.search_patients(name, limit=1)["results"]
+            if not matches:
+                return None
 
-            patients = [row["patients"] for row in result]
-            if patients:
-                return patients[0]  # Return first match
-            return None
+            patient_id = matches[0]["patient_id"]
+            return self.collections["patients"].get(str(patient_id)).content_as[dict]
 
         except Exception as e:
             print(f"[Memory System] Error searching for patient '{name}': {e}")
             return None
 
+    def name_index_version(self) -> int:
+        """Counter that changes whenever a patient is created or renamed"""
+        # Changes made outside this process are seen at the next index
+        # rebuild, at most name_index_ttl seconds later
+        return self.name_index.version
+
+    def _touch_last_seen(self, patient_id: int, date: str):
+        """Record a consultation date as the patient's last_seen"""
+        # New consultations are always dated today, so the latest write is
+        # also the most recent date; backfill_last_seen repairs anything else
+        self.collections["patients"].mutate_in(
+            str(patient_id), [SD.upsert("last_seen", date)]
+        )
+
     def add_consultation_note(self, patient_id: int, doctor: str, notes: str) -> bool:
         """Add a new consultation note for a patient"""
         try:
-            consultation_id = f"{patient_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            consultation = {
-                "consultation_id": consultation_id,
-                "patient_id": patient_id,
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "doctor": doctor,
-                "notes": notes,
-                "created_at": datetime.now().isoformat(),
-            }
+            consultation = consultation_record(patient_id, doctor, notes)
 
-            self.collections["consultations"].upsert(consultation_id, consultation)
+            self.collections["consultations"].upsert(
+                consultation["consultation_id"], consultation
+            )
+            self._touch_last_seen(patient_id, consultation["date"])
+            self._invalidate_profile(patient_id)
             print(f"[Memory System] Added consultation note for patient {patient_id}")
             return True
 
@@ -120,23 +459,14 @@ class PatientMemory:
     ) -> bool:
         """Add a new medication for a patient"""
         try:
-            # Clean medication name for ID
-            med_name_clean = medication.lower().replace(" ", "_").replace("-", "_")[:20]
-            medication_id = (
-                f"{patient_id}_{med_name_clean}_{datetime.now().strftime('%Y%m%d')}"
-            )
-
-            med_record = {
-                "medication_id": medication_id,
-                "patient_id": patient_id,
-                "medication": medication,
-                "prescribed_date": prescribed_date
-                or datetime.now().strftime("%Y-%m-%d"),
-                "status": status,
-                "created_at": datetime.now().isoformat(),
-            }
+            med_record = medication_record(
+                patient_id, medication, prescribed_date, status
+            )
 
-            self.collections["medications"].upsert(medication_id, med_record)
+            self.collections["medications"].upsert(
+                med_record["medication_id"], med_record
+            )
+            self._invalidate_profile(patient_id)
             print(
                 f"[Memory System] Added medication '{medication}' for patient {patient_id}"
             )
@@ -157,20 +487,10 @@ class PatientMemory:
     ) -> bool:
         """Add a new allergy for a patient"""
         try:
-            # Clean allergen name for ID
-            allergen_clean = allergen.lower().replace(" ", "_").replace("-", "_")[:20]
-            allergy_id = f"{patient_id}_{allergen_clean}"
-
-            allergy_record = {
-                "allergy_id": allergy_id,
-                "patient_id": patient_id,
-                "allergen": allergen,
-                "severity": severity,
-                "notes": notes,
-                "created_at": datetime.now().isoformat(),
-            }
+            record = allergy_record(patient_id, allergen, severity, notes)
 
-            self.collections["allergies"].upsert(allergy_id, allergy_record)
+            self.collections["allergies"].upsert(record["allergy_id"], record)
+            self._invalidate_profile(patient_id)
             print(
                 f"[Memory System] Added allergy '{allergen}' for patient {patient_id}"
             )
@@ -185,21 +505,10 @@ class PatientMemory:
     ) -> bool:
         """Add a new preference for a patient"""
         try:
-            # Create unique preference ID
-            pref_id = (
-                f"{patient_id}_{category}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            )
-
-            preference_record = {
-                "preference_id": pref_id,
-                "patient_id": patient_id,
-                "category": category,
-                "preference": preference,
-                "notes": notes,
-                "created_at": datetime.now().isoformat(),
-            }
+            record = preference_record(patient_id, category, preference, notes)
 
-            self.collections["preferences"].upsert(pref_id, preference_record)
+            self.collections["preferences"].upsert(record["preference_id"], record)
+            self._invalidate_profile(patient_id)
             print(
                 f"[Memory System] Added preference for patient {patient_id}: {preference}"
             )
@@ -211,35 +520,123 @@ class PatientMemory:
             )
             return False
 
-    def list_recent_patients(self, limit: int = 10) -> list:
-        """Get list of patients ordered by most recent consultation"""
-        try:
-            query = f"""
-            SELECT p.patient_id, p.name, MAX(c.date) as last_seen
-            FROM `{self.bucket.name}`.{self.scope.name}.patients p
-            LEFT JOIN `{self.bucket.name}`.{self.scope.name}.consultations c
-            ON p.patient_id = c.patient_id
-            GROUP BY p.patient_id, p.name
-            ORDER BY last_seen DESC NULLS LAST
-            LIMIT $1
-            """
-            result = self.cluster.query(query, limit)
-            return [row for row in result]
+    def apply_updates(
+        self, patient_id: int, updates: list, validate: bool = True
+    ) -> dict:
+        """
+        Write a batch of memory updates for one patient.
+
+        The patient is validated once, then each collection's documents are
+        sent in a single pipelined upsert_multi call.
+
+        Args:
+            patient_id: Patient the updates belong to
+            updates: List of update dicts as accepted by records.build_record
+            validate: Set to False when the caller has already checked that
+                the patient exists
+
+        Returns:
+            Dict with overall status ("success", "partial" or "error") and a
+            per-item "results" list in input order
+        """
+        if validate and not self.patient_exists(patient_id):
+            return {
+                "status": "error",
+                "message": f"Patient not found: {patient_id}",
+                "results": [],
+            }
+
+        results, batches = prepare_batch(patient_id, updates)
+
+        for collection_name, batch in batches.items():
+            docs = {doc_id: document for doc_id, (_, document) in batch.items()}
+            try:
+                outcome = self.collections[collection_name].upsert_multi(docs)
+                errors = {key: str(exc) for key, exc in outcome.exceptions.items()}
+            except Exception as e:
+                errors = {doc_id: str(e) for doc_id in docs}
+
+            for doc_id, (index, _) in batch.items():
+                if doc_id in errors:
+                    results[index]["error"] = errors[doc_id]
+                else:
+                    results[index]["success"] = True
+
+        seen = [
+            document["date"]
+            for doc_id, (index, document) in batches.get("consultations", {}).items()
+            if results[index]["success"]
+        ]
+        if seen:
+            try:
+                self._touch_last_seen(patient_id, max(seen))
+            except Exception as e:
+                print(
+                    f"[Memory System] Error updating last_seen for patient {patient_id}: {e}"
+                )
 
+        if batches:
+            self._invalidate_profile(patient_id)
+
+        summary = batch_summary(results)
+        print(f"[Memory System] {summary['message']} for patient {patient_id}")
+        return summary
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters for the in-process caches"""
+        return {
+            "profiles": self.profile_cache.stats(),
+            "name_index": {
+                "size": len(self.name_index),
+                "version": self.name_index.version,
+            },
+        }
+
+    def ping(self) -> dict:
+        """Time a KV lookup and a trivial query against the cluster"""
+        start = time.perf_counter()
+        self.collections["patients"].exists("__medicai_ping__")
+        kv_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        list(self.cluster.query("SELECT RAW 1"))
+        query_ms = (time.perf_counter() - start) * 1000
+
+        return {"kv_ms": round(kv_ms, 2), "query_ms": round(query_ms, 2)}
+
+    def close(self):
+        """Close the cluster connection"""
+        self.cluster.close()
+        print("[Memory System] Disconnected from Couchbase medical database")
+
+    def list_patients_page(self, limit: int = 10, cursor=None) -> dict:
+        """Get one page of patients ordered by most recent consultation"""
+        after = decode_cursor(cursor, (str, int)) if cursor else None
+        try:
+            query = self._patients_page_query(after is not None)
+            rows = list(self.cluster.query(query, *(after or ()), limit + 1))
         except Exception as e:
             print(f"[Memory System] Error listing recent patients: {e}")
-            return []
+            return {"patients": [], "next_cursor": None}
 
+        result = page(rows, limit, lambda row: (row["last_seen"], row["patient_id"]))
+        for row in result["items"]:
+            row["last_seen"] = row["last_seen"] or None
+        return {"patients": result["items"], "next_cursor": result["next_cursor"]}
 
-# Initialize global patient memory instance
-COUCHBASE_CONN_STR = os.getenv("COUCHBASE_CONN_STR")
-COUCHBASE_USERNAME = os.getenv("COUCHBASE_USERNAME")
-COUCHBASE_PASSWORD = os.getenv("COUCHBASE_PASSWORD")
-COUCHBASE_BUCKET = os.getenv("COUCHBASE_BUCKET")
+    def backfill_last_seen(self) -> int:
+        """
+        Set every patient's last_seen from their consultations.
 
-patient_memory = PatientMemory(
-    conn_str=COUCHBASE_CONN_STR,
-    username=COUCHBASE_USERNAME,
-    password=COUCHBASE_PASSWORD,
-    bucket_name=COUCHBASE_BUCKET,
-)
+        One-off repair for data loaded without last_seen (or written by
+        older versions); safe to re-run.
+
+        Returns:
+            Number of patient documents updated
+        """
+        updated = run_mutation(self.cluster, self._backfill_last_seen_query())
+        with self._profile_lock:
+            self._profile_epoch += 1
+            self.profile_cache.clear()
+        print(f"[Memory System] Backfilled last_seen for {updated} patients")
+        return updated
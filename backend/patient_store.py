@@ -0,0 +1,138 @@
+from abc import ABC, abstractmethod
+
+
+class PatientStore(ABC):
+    """
+    Storage interface for patient memory.
+
+    PatientMemory (Couchbase) and InMemoryPatientMemory (in-process) both
+    implement it; medical_tools and api_routes only rely on these methods.
+    """
+
+    @abstractmethod
+    def get_patient_profile(
+        self, patient_id: int, fields: str = None, view: str = None
+    ) -> dict:
+        """
+        Get a patient profile, or None if the patient does not exist.
+
+        Only the most recent consultations are embedded; when there are
+        more, "consultations_next_cursor" pages through the rest with
+        get_patient_records.
+
+        Args:
+            patient_id: Patient to fetch
+            fields: Comma-separated profile sections to return
+            view: Named view from records.PROFILE_VIEWS, e.g. "summary"
+
+        Raises:
+            ValueError: If fields or view is invalid
+        """
+
+    @abstractmethod
+    def patient_exists(self, patient_id: int) -> bool:
+        """Check that a patient exists"""
+
+    @abstractmethod
+    def search_patients(self, query: str, limit: int = 10, offset: int = 0) -> dict:
+        """
+        Ranked patient name search.
+
+        Returns:
+            Dict with "total" matches and a "results" page of
+            {"patient_id", "name", "score"} dicts, best match first
+        """
+
+    @abstractmethod
+    def get_patient_by_name(self, name: str) -> dict:
+        """Find the best-matching patient doc for a name, or None"""
+
+    @abstractmethod
+    def add_consultation_note(self, patient_id: int, doctor: str, notes: str) -> bool:
+        """Add a new consultation note for a patient"""
+
+    @abstractmethod
+    def add_medication(
+        self,
+        patient_id: int,
+        medication: str,
+        prescribed_date: str = None,
+        status: str = "active",
+    ) -> bool:
+        """Add a new medication for a patient"""
+
+    @abstractmethod
+    def add_allergy(
+        self,
+        patient_id: int,
+        allergen: str,
+        severity: str = "moderate",
+        notes: str = "",
+    ) -> bool:
+        """Add a new allergy for a patient"""
+
+    @abstractmethod
+    def add_preference(
+        self, patient_id: int, category: str, preference: str, notes: str = ""
+    ) -> bool:
+        """Add a new preference for a patient"""
+
+    @abstractmethod
+    def apply_updates(
+        self, patient_id: int, updates: list, validate: bool = True
+    ) -> dict:
+        """Write a batch of memory updates for one patient"""
+
+    @abstractmethod
+    def get_patient_records(
+        self, patient_id: int, collection_name: str, limit: int = 20, cursor=None
+    ) -> dict:
+        """
+        Get one page of a patient's documents from a collection, newest first.
+
+        Returns:
+            Dict with the "items" page and "next_cursor" (None on the last page)
+
+        Raises:
+            ValueError: If the collection or cursor is invalid
+        """
+
+    @abstractmethod
+    def list_patients_page(self, limit: int = 10, cursor=None) -> dict:
+        """
+        Get one page of patients ordered by most recent consultation.
+
+        Returns:
+            Dict with the "patients" page and "next_cursor" (None on the
+            last page)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+
+    def list_recent_patients(self, limit: int = 10) -> list:
+        """Get list of patients ordered by most recent consultation"""
+        return self.list_patients_page(limit)["patients"]
+
+    @abstractmethod
+    def ping(self) -> dict:
+        """
+        Measure a real round trip to the backing store.
+
+        Returns:
+            Dict of check name -> latency in milliseconds
+
+        Raises:
+            Exception: If the store cannot be reached
+        """
+
+    @abstractmethod
+    def name_index_version(self) -> int:
+        """Counter that changes whenever a patient is created or renamed"""
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters for any in-process caches"""
+        return {}
+
+    def close(self):
+        """Release connections held by the store"""
@@ -0,0 +1,377 @@
+"""
+Document builders for the per-patient collections.
+
+Shared by PatientMemory and bulk tooling so every writer produces the same
+document shape and ID conventions.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from pathlib import Path
+
+# Per-patient collections that make up a profile alongside the patient doc
+PROFILE_COLLECTIONS = ("consultations", "medications", "allergies", "preferences")
+
+# Collections in the medicai scope, in load order
+COLLECTIONS = ("patients",) + PROFILE_COLLECTIONS
+
+JSON_LINES_SUFFIXES = {".jsonl", ".ndjson"}
+
+# Field holding the document key in each per-patient collection
+ID_FIELDS = {
+    "consultations": "consultation_id",
+    "medications": "medication_id",
+    "allergies": "allergy_id",
+    "preferences": "preference_id",
+}
+
+
+# Field each per-patient collection is paged on, newest first; the ID field
+# breaks ties so every document has a unique position
+SORT_FIELDS = {
+    "consultations": "date",
+    "medications": "prescribed_date",
+    "allergies": "created_at",
+    "preferences": "created_at",
+}
+
+
+def sort_key(collection_name: str, document: dict) -> tuple:
+    """(sort value, document ID) position of a document in its page order"""
+    return (
+        document.get(SORT_FIELDS[collection_name]) or "",
+        document[ID_FIELDS[collection_name]],
+    )
+
+
+def encode_cursor(key) -> str:
+    """Opaque page cursor for the position after a sort key"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: tuple = (str, str)) -> tuple:
+    """
+    Sort key encoded by encode_cursor.
+
+    Args:
+        cursor: Cursor returned with a previous page
+        types: Expected type of each sort key part
+
+    Raises:
+        ValueError: If the cursor is malformed or from a different listing
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if (
+        not isinstance(key, list)
+        or len(key) != len(types)
+        or not all(type(part) is t for part, t in zip(key, types))
+    ):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return tuple(key)
+
+
+# Sections of a patient profile, in response order
+PROFILE_SECTIONS = ("patient_info",) + PROFILE_COLLECTIONS
+
+# Named profile views: section -> fields to keep (None keeps whole documents)
+PROFILE_VIEWS = {
+    "full": {section: None for section in PROFILE_SECTIONS},
+    # Sidebar / patient header
+    "summary": {
+        "patient_info": ("patient_id", "name", "date_of_birth", "last_seen"),
+        "medications": ("medication", "status"),
+        "allergies": ("allergen", "severity"),
+    },
+    # Allergy banner
+    "alerts": {
+        "patient_info": ("patient_id", "name"),
+        "allergies": ("allergen", "severity", "notes"),
+    },
+}
+
+
+def profile_projection(fields: str = None, view: str = None) -> dict:
+    """
+    Sections and fields a profile request asks for.
+
+    Projected collection documents always keep their ID and sort fields, so
+    the result can still be paged with get_patient_records.
+
+    Args:
+        fields: Comma-separated section names, e.g. "patient_info,allergies"
+        view: Name of a PROFILE_VIEWS entry
+
+    Returns:
+        Dict of section -> tuple of fields (None for whole documents), or
+        None for the full profile
+
+    Raises:
+        ValueError: If the view or a section is unknown, or both are given
+    """
+    if fields and view:
+        raise ValueError("Pass either fields or view, not both")
+    if view:
+        if view not in PROFILE_VIEWS:
+            raise ValueError(
+                f"Unknown view: {view} (expected one of {', '.join(PROFILE_VIEWS)})"
+            )
+        projection = PROFILE_VIEWS[view]
+    elif fields:
+        sections = [section.strip() for section in fields.split(",") if section.strip()]
+        unknown = [section for section in sections if section not in PROFILE_SECTIONS]
+        if unknown or not sections:
+            raise ValueError(
+                f"Unknown profile fields: {', '.join(unknown) or fields} "
+                f"(expected some of {', '.join(PROFILE_SECTIONS)})"
+            )
+        projection = {section: None for section in sections}
+    else:
+        return None
+
+    if projection.keys() == set(PROFILE_SECTIONS) and not any(projection.values()):
+        return None
+    return {
+        section: (
+            keep
+            if keep is None or section == "patient_info"
+            else tuple(dict.fromkeys((ID_FIELDS[section], SORT_FIELDS[section]) + keep))
+        )
+        for section, keep in projection.items()
+    }
+
+
+def project_profile(profile: dict, projection: dict) -> dict:
+    """Copy of a full profile reduced to a profile_projection"""
+    if projection is None:
+        return profile
+
+    projected = {}
+    for section, fields in projection.items():
+        value = profile.get(section)
+        if section == "patient_info":
+            projected[section] = _project(value, fields) if value else value
+        else:
+            projected[section] = [_project(doc, fields) for doc in value or []]
+    if "consultations" in projection:
+        projected["consultations_next_cursor"] = profile.get(
+            "consultations_next_cursor"
+        )
+    return projected
+
+
+def _project(document: dict, fields) -> dict:
+    if fields is None:
+        return document
+    return {field: document[field] for field in fields if field in document}
+
+
+def page(rows: list, limit: int, key) -> dict:
+    """
+    Split limit + 1 fetched rows into a page and the cursor for the next one.
+
+    Args:
+        rows: Up to limit + 1 rows in page order
+        limit: Page size
+        key: Function returning a row's sort key
+
+    Returns:
+        Dict with the "items" page and "next_cursor" (None on the last page)
+    """
+    items = rows[:limit]
+    has_more = len(rows) > limit and items
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(key(items[-1])) if has_more else None,
+    }
+
+
+def _clean_for_id(value: str) -> str:
+    return value.lower().replace(" ", "_").replace("-", "_")[:20]
+
+
+def consultation_record(
+    patient_id: int, doctor: str, notes: str, now: datetime = None
+) -> dict:
+    """Build a consultation note document"""
+    now = now or datetime.now()
+    return {
+        "consultation_id": f"{patient_id}_{now.strftime('%Y%m%d_%H%M%S')}",
+        "patient_id": patient_id,
+        "date": now.strftime("%Y-%m-%d"),
+        "doctor": doctor,
+        "notes": notes,
+        "created_at": now.isoformat(),
+    }
+
+
+def medication_record(
+    patient_id: int,
+    medication: str,
+    prescribed_date: str = None,
+    status: str = "active",
+    now: datetime = None,
+) -> dict:
+    """Build a medication document"""
+    now = now or datetime.now()
+    return {
+        "medication_id": f"{patient_id}_{_clean_for_id(medication)}_{now.strftime('%Y%m%d')}",
+        "patient_id": patient_id,
+        "medication": medication,
+        "prescribed_date": prescribed_date or now.strftime("%Y-%m-%d"),
+        "status": status,
+        "created_at": now.isoformat(),
+    }
+
+
+def allergy_record(
+    patient_id: int,
+    allergen: str,
+    severity: str = "moderate",
+    notes: str = "",
+    now: datetime = None,
+) -> dict:
+    """Build an allergy document"""
+    now = now or datetime.now()
+    return {
+        "allergy_id": f"{patient_id}_{_clean_for_id(allergen)}",
+        "patient_id": patient_id,
+        "allergen": allergen,
+        "severity": severity,
+        "notes": notes,
+        "created_at": now.isoformat(),
+    }
+
+
+def preference_record(
+    patient_id: int,
+    category: str,
+    preference: str,
+    notes: str = "",
+    now: datetime = None,
+) -> dict:
+    """Build a preference document"""
+    now = now or datetime.now()
+    return {
+        "preference_id": f"{patient_id}_{category}_{now.strftime('%Y%m%d_%H%M%S')}",
+        "patient_id": patient_id,
+        "category": category,
+        "preference": preference,
+        "notes": notes,
+        "created_at": now.isoformat(),
+    }
+
+
+# Update type -> (collection, builder) for batch writes
+RECORD_BUILDERS = {
+    "consultation": ("consultations", consultation_record),
+    "medication": ("medications", medication_record),
+    "allergy": ("allergies", allergy_record),
+    "preference": ("preferences", preference_record),
+}
+
+
+def build_record(patient_id: int, update: dict) -> tuple:
+    """
+    Build the document for one batch update.
+
+    Args:
+        patient_id: Patient the update belongs to
+        update: Dict with a "type" key ("consultation", "medication",
+            "allergy" or "preference") plus the keyword arguments of the
+            matching builder, e.g. {"type": "allergy", "allergen": "Latex"}
+
+    Returns:
+        (collection_name, document) tuple
+
+    Raises:
+        ValueError: If the update type is unknown or its fields are invalid
+    """
+    fields = dict(update)
+    update_type = fields.pop("type", None)
+    if update_type not in RECORD_BUILDERS:
+        raise ValueError(f"Unknown update type: {update_type}")
+
+    collection_name, builder = RECORD_BUILDERS[update_type]
+    try:
+        return collection_name, builder(patient_id, **fields)
+    except TypeError as e:
+        raise ValueError(f"Invalid {update_type} update: {e}") from e
+
+
+def prepare_batch(patient_id: int, updates: list) -> tuple:
+    """
+    Build the documents for a batch of updates to one patient.
+
+    IDs are second-resolution, so repeats within the batch get a numeric
+    suffix instead of overwriting each other.
+
+    Returns:
+        (results, batches) where results holds one result dict per update in
+        input order (invalid updates already carry an "error") and batches
+        maps collection name -> {doc_id: (result index, document)}
+    """
+    results = []
+    batches = {}
+    for index, update in enumerate(updates):
+        result = {"index": index, "type": update.get("type"), "success": False}
+        results.append(result)
+        try:
+            collection_name, record = build_record(patient_id, update)
+        except ValueError as e:
+            result["error"] = str(e)
+            continue
+
+        batch = batches.setdefault(collection_name, {})
+        id_field = ID_FIELDS[collection_name]
+        doc_id = record[id_field]
+        suffix = 1
+        while doc_id in batch:
+            suffix += 1
+            doc_id = f"{record[id_field]}_{suffix}"
+        record[id_field] = doc_id
+
+        result["id"] = doc_id
+        batch[doc_id] = (index, record)
+
+    return results, batches
+
+
+def batch_summary(results: list) -> dict:
+    """Overall status ("success", "partial" or "error") for batch results"""
+    written = sum(1 for result in results if result["success"])
+    if written == len(results):
+        status = "success"
+    elif written:
+        status = "partial"
+    else:
+        status = "error"
+
+    return {
+        "status": status,
+        "message": f"Applied {written} of {len(results)} updates",
+        "results": results,
+    }
+
+
+def iter_documents(data_file_path):
+    """Yield (collection_name, document) pairs from a JSON or JSON Lines file"""
+    path = Path(data_file_path)
+    if path.suffix in JSON_LINES_SUFFIXES:
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield entry["collection"], entry["document"]
+    else:
+        with open(path, "r") as f:
+            data = json.load(f)
+        for collection_name in COLLECTIONS:
+            for item in data.get(collection_name, []):
+                yield collection_name, item
@@ -0,0 +1,40 @@
+import contextvars
+from contextlib import contextmanager
+
+# Doctor and session of the agent request being served. Every asyncio task
+# has its own copy, and tasks the ADK starts for tool calls inherit it, so
+# concurrent requests cannot see each other's values.
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+
+@contextmanager
+def request_context(doctor_id: str, session_id: str = None):
+    """
+    Make the doctor and session of an agent request visible to its tools.
+
+    Args:
+        doctor_id: Doctor the request is made for
+        session_id: Agent session the request runs in
+    """
+    token = _current_request.set({"doctor_id": doctor_id, "session_id": session_id})
+    try:
+        yield
+    finally:
+        try:
+            _current_request.reset(token)
+        except ValueError:
+            # A streaming generator closed from another task; that task's
+            # context never had the value set
+            pass
+
+
+def current_doctor_id(default: str = None) -> str:
+    """Doctor of the agent request being served, or default outside one"""
+    context = _current_request.get()
+    return context["doctor_id"] if context else default
+
+
+def current_session_id(default: str = None) -> str:
+    """Agent session of the request being served, or default outside one"""
+    context = _current_request.get()
+    return context["session_id"] if context else default
@@ -0,0 +1,22 @@
+from google.adk.models.google_llm import Gemini
+
+from llm_scheduler import llm_scheduler
+
+
+class ScheduledGemini(Gemini):
+    """
+    Gemini model whose calls go through the shared LLM scheduler.
+
+    Each model call an agent run makes (one per tool round trip) waits for
+    admission at the priority of the request it serves, and a call rejected
+    with a rate limit is retried after the scheduler's backoff. A call that
+    fails after it started streaming is not retried, so nothing is yielded
+    twice.
+    """
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        parent = super().generate_content_async
+        async for response in llm_scheduler.stream(
+            lambda: parent(llm_request, stream)
+        ):
+            yield response
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Backfill last_seen Script
+Sets the last_seen field on every patient document from their most recent
+consultation, so list_recent_patients can read patients in last_seen order
+instead of aggregating all consultations. Safe to re-run.
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import create_patient_memory
+
+# Load environment variables
+load_dotenv()
+
+
+def main():
+    """Main function to backfill last_seen on patient documents"""
+    print("🕒 MedicAI - Backfilling last_seen")
+    print("=" * 50)
+
+    try:
+        patient_memory = create_patient_memory("couchbase")
+        updated = patient_memory.backfill_last_seen()
+        patient_memory.close()
+        print(f"\n🎉 Updated last_seen on {updated} patients")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
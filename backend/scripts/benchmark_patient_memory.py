@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Benchmark PatientMemory Script
+Measures p50/p95/p99 latency and throughput of the PatientMemory hot paths
+against the in-process stand-in store, across dataset sizes.
+
+Runs offline: data comes from generate_synthetic_data.py and lives in an
+InMemoryPatientMemory. Results are written as JSON so runs can be compared;
+pass --baseline to diff against an earlier results file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_synthetic_data import generate
+from memory_store import InMemoryPatientMemory
+
+START_ID = 100000
+
+
+def build_store(patients, records_scale, seed):
+    """Create a stand-in store loaded with a synthetic dataset"""
+    store = InMemoryPatientMemory()
+    documents = store.load(
+        generate(patients, seed=seed, start_id=START_ID, records_scale=records_scale)
+    )
+    return store, documents
+
+
+def operations(store, patients, rng):
+    """Name -> zero-argument callable for each benchmarked operation"""
+    patient_ids = range(START_ID, START_ID + patients)
+    names = [
+        store.get_patient_profile(pid)["patient_info"]["name"]
+        for pid in rng.sample(patient_ids, min(patients, 100))
+    ]
+
+    def random_id():
+        return rng.choice(patient_ids)
+
+    return {
+        "get_patient_profile": lambda: store.get_patient_profile(random_id()),
+        "get_patient_profile[alerts]": lambda: store.get_patient_profile(
+            random_id(), view="alerts"
+        ),
+        "patient_exists": lambda: store.patient_exists(random_id()),
+        "get_patient_by_name": lambda: store.get_patient_by_name(
+            rng.choice(names).split()[-1]
+        ),
+        "search_patients": lambda: store.search_patients(
+            rng.choice(names)[:-1], limit=10
+        ),
+        "list_recent_patients": lambda: store.list_recent_patients(limit=10),
+        "add_consultation_note": lambda: store.add_consultation_note(
+            random_id(), "Dr. Bench", "Benchmark consultation note"
+        ),
+        "add_medication": lambda: store.add_medication(
+            random_id(), f"Benchmark drug {rng.randrange(1000)}"
+        ),
+        "add_allergy": lambda: store.add_allergy(
+            random_id(), f"Benchmark allergen {rng.randrange(1000)}", "mild"
+        ),
+        "add_preference": lambda: store.add_preference(
+            random_id(), "general", "Benchmark preference"
+        ),
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(
+        len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1)
+    )
+    return sorted_values[index]
+
+
+def measure(func, iterations, warmup):
+    """Time iterations calls of func; returns latency and throughput stats"""
+    for _ in range(warmup):
+        func()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter_ns()
+        func()
+        latencies.append(time.perf_counter_ns() - call_start)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    to_ms = 1e-6
+    return {
+        "iterations": iterations,
+        "mean_ms": sum(latencies) / len(latencies) * to_ms,
+        "p50_ms": percentile(latencies, 0.50) * to_ms,
+        "p95_ms": percentile(latencies, 0.95) * to_ms,
+        "p99_ms": percentile(latencies, 0.99) * to_ms,
+        "max_ms": latencies[-1] * to_ms,
+        "throughput_ops": iterations / elapsed if elapsed > 0 else None,
+    }
+
+
+def run(patient_counts, records_scales, iterations, warmup, seed, only=None):
+    """Run every operation for every dataset shape; returns result rows"""
+    results = []
+    for patients in patient_counts:
+        for records_scale in records_scales:
+            load_start = time.perf_counter()
+            store, documents = build_store(patients, records_scale, seed)
+            load_seconds = time.perf_counter() - load_start
+            print(
+                f"\n📦 {patients} patients, records scale {records_scale}: "
+                f"{documents} documents loaded in {load_seconds:.2f}s"
+            )
+
+            rng = random.Random(seed)
+            for name, func in operations(store, patients, rng).items():
+                if only and name not in only:
+                    continue
+                stats = measure(func, iterations, warmup)
+                results.append(
+                    {
+                        "operation": name,
+                        "patients": patients,
+                        "records_scale": records_scale,
+                        "documents": documents,
+                        **stats,
+                    }
+                )
+                print(
+                    f"  {name:<24} p50 {stats['p50_ms']:8.3f}ms  "
+                    f"p95 {stats['p95_ms']:8.3f}ms  p99 {stats['p99_ms']:8.3f}ms  "
+                    f"{stats['throughput_ops']:>12,.0f} ops/s"
+                )
+    return results
+
+
+def compare(results, baseline_results, threshold):
+    """Print p50/p95 deltas against a baseline; returns the regressed rows"""
+
+    def key(row):
+        return (row["operation"], row["patients"], row["records_scale"])
+
+    baseline = {key(row): row for row in baseline_results}
+    regressions = []
+    print(f"\n📊 Comparison with baseline (regression threshold {threshold:.0%})")
+    for row in results:
+        previous = baseline.get(key(row))
+        if not previous:
+            continue
+        changes = {
+            metric: (row[metric] - previous[metric]) / previous[metric]
+            for metric in ("p50_ms", "p95_ms")
+            if previous[metric]
+        }
+        regressed = any(change > threshold for change in changes.values())
+        marker = "❌ REGRESSION" if regressed else "✅"
+        deltas = "  ".join(
+            f"{metric} {change:+.1%}" for metric, change in changes.items()
+        )
+        print(
+            f"  {marker} {row['operation']} ({row['patients']} patients, x{row['records_scale']}): {deltas}"
+        )
+        if regressed:
+            regressions.append(row)
+    return regressions
+
+
+def parse_list(cast):
+    return lambda value: [cast(item) for item in value.split(",")]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--patients",
+        type=parse_list(int),
+        default=[1000, 10000],
+        help="comma-separated patient counts (default: 1000,10000)",
+    )
+    parser.add_argument(
+        "--records-scale",
+        type=parse_list(float),
+        default=[1.0, 5.0],
+        help="comma-separated consultations-per-patient multipliers (default: 1,5)",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=1000, help="timed calls per operation"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=100, help="untimed calls per operation"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument(
+        "--operations",
+        type=parse_list(str),
+        help="comma-separated subset of operations to run",
+    )
+    parser.add_argument("--output", "-o", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="relative p50/p95 slowdown counted as a regression (default: 0.10)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Main function to run the PatientMemory benchmarks"""
+    args = parse_args()
+
+    print("⏱️  MedicAI - PatientMemory Benchmark (in-process store)")
+    print("=" * 50)
+
+    results = run(
+        args.patients,
+        args.records_scale,
+        args.iterations,
+        args.warmup,
+        args.seed,
+        args.operations,
+    )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "memory",
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if compare(results, baseline["results"], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Generate Synthetic Patient Data Script
+Writes a seeded, deterministic dataset of N patients as JSON Lines for load
+testing, in the same schema and ID conventions PatientMemory uses.
+
+Output is streamed one patient at a time, so generating millions of records
+never holds more than a single patient's documents in memory. Load it with:
+
+    reset_couchbase_data.py --data patients.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import (
+    allergy_record,
+    consultation_record,
+    medication_record,
+    preference_record,
+)
+
+FIRST_NAMES = [
+    "Aoife",
+    "Áine",
+    "Brigid",
+    "Caoimhe",
+    "Ciara",
+    "Clodagh",
+    "Deirdre",
+    "Éabha",
+    "Gráinne",
+    "Niamh",
+    "Orla",
+    "Róisín",
+    "Saoirse",
+    "Siobhán",
+    "Aidan",
+    "Cian",
+    "Colm",
+    "Conor",
+    "Darragh",
+    "Eoin",
+    "Fionn",
+    "Liam",
+    "Oisín",
+    "Pádraig",
+    "Ronan",
+    "Seán",
+    "Tadhg",
+    "Cillian",
+    "Mary",
+    "John",
+]
+
+LAST_NAMES = [
+    "Murphy",
+    "Kelly",
+    "O'Sullivan",
+    "Walsh",
+    "Smith",
+    "O'Brien",
+    "Byrne",
+    "Ryan",
+    "O'Connor",
+    "O'Neill",
+    "O'Reilly",
+    "Doyle",
+    "McCarthy",
+    "Gallagher",
+    "O'Doherty",
+    "Kennedy",
+    "Lynch",
+    "Murray",
+    "Quinn",
+    "Moore",
+    "Flanagan",
+    "Ní Bhriain",
+    "Mac Giolla Phádraig",
+    "Ó Súilleabháin",
+]
+
+DOCTORS = [
+    "Dr. Sarah Lynch",
+    "Dr. Michael Chen",
+    "Dr. Aoife Brennan",
+    "Dr. James O'Connor",
+    "Dr. Priya Nair",
+    "Dr. Declan Walsh",
+]
+
+CONDITIONS = [
+    "Type 2 Diabetes",
+    "Hypertension",
+    "Asthma",
+    "Osteoarthritis",
+    "Hypothyroidism",
+    "Migraine",
+    "Anxiety",
+    "Depression",
+    "High cholesterol",
+    "Vitamin D deficiency",
+    "Eczema",
+    "Coeliac disease",
+    "GERD",
+]
+
+FAMILY_HISTORY = [
+    "Mother had breast cancer",
+    "Father has high blood pressure",
+    "Family history of heart disease",
+    "Grandmother had Alzheimer's disease",
+    "Brother has Type 1 Diabetes",
+    "Father died of stroke",
+]
+
+NOTE_TEMPLATES = [
+    "Patient reports {symptom}. {assessment} Follow up in {weeks} weeks.",
+    "Review of {condition}. {assessment} Discussed lifestyle changes.",
+    "Presented with {symptom}. {assessment} Bloods ordered.",
+    "Routine check-up. {condition} stable. {assessment}",
+]
+
+SYMPTOMS = [
+    "persistent headaches",
+    "fatigue and low mood",
+    "lower back pain",
+    "shortness of breath on exertion",
+    "sleep disturbances",
+    "intermittent chest tightness",
+    "joint stiffness in the mornings",
+]
+
+ASSESSMENTS = [
+    "No acute concerns.",
+    "Symptoms improving with current treatment.",
+    "Medication dose adjusted.",
+    "Referred to specialist.",
+    "Advised rest and hydration.",
+]
+
+MEDICATIONS = [
+    "Metformin 500mg twice daily",
+    "Lisinopril 10mg daily",
+    "Atorvastatin 20mg daily",
+    "Salbutamol inhaler as needed",
+    "Levothyroxine 50mcg daily",
+    "Sertraline 50mg daily",
+    "Vitamin D3 1000IU daily",
+    "Omeprazole 20mg daily",
+    "Paracetamol 1g as needed",
+    "Amlodipine 5mg daily",
+    "Sumatriptan 50mg as needed",
+    "Ferrous sulfate 200mg daily",
+]
+
+ALLERGENS = [
+    ("Penicillin", "Causes rash and breathing difficulties"),
+    ("NSAIDs", "Causes stomach upset"),
+    ("Latex", "Contact dermatitis"),
+    ("Shellfish", "Hives and swelling"),
+    ("Peanuts", "Anaphylaxis risk, carries EpiPen"),
+    ("Pollen", "Seasonal hay fever"),
+    ("Sulfa drugs", "Skin rash"),
+]
+
+PREFERENCES = [
+    ("scheduling", "Prefers morning appointments", "Works best with 9-11am slots"),
+    ("scheduling", "Prefers afternoon appointments", "College schedule"),
+    ("communication", "Prefers email reminders", ""),
+    ("communication", "Likes detailed explanations", "Visual learner"),
+    ("treatment", "Prefers non-pharmacological options first", ""),
+    ("treatment", "Wants to be involved in care decisions", ""),
+    ("general", "Bring daughter to appointments", "Hearing difficulties"),
+]
+
+
+def _random_time(rng, start, end):
+    """Random datetime between start and end, truncated to the second"""
+    seconds = int((end - start).total_seconds())
+    return start + timedelta(seconds=rng.randrange(max(seconds, 1)))
+
+
+def _distinct_times(rng, count, start, end):
+    """count distinct second-resolution datetimes, oldest first"""
+    times = set()
+    while len(times) < count:
+        times.add(_random_time(rng, start, end))
+    return sorted(times)
+
+
+def generate_patient(rng, patient_id, reference_date, records_scale=1.0):
+    """
+    Yield (collection_name, document) pairs for one synthetic patient.
+
+    records_scale multiplies the mean number of consultations, the part of a
+    profile that grows with a patient's history.
+    """
+    birth = _random_time(
+        rng, reference_date - timedelta(days=95 * 365), reference_date
+    ).date()
+    registered = _random_time(
+        rng,
+        max(
+            datetime.combine(birth, datetime.min.time()),
+            reference_date - timedelta(days=10 * 365),
+        ),
+        reference_date,
+    )
+    age = (reference_date.date() - birth).days // 365
+
+    # Long-tailed visit counts: most patients have a handful, a few have many
+    mean_visits = (2 + age / 15) * records_scale
+    consultation_count = min(
+        int(rng.expovariate(1 / mean_visits)), int(200 * records_scale)
+    )
+    visit_times = _distinct_times(rng, consultation_count, registered, reference_date)
+
+    history = rng.sample(CONDITIONS, rng.choice([0, 1, 1, 2, 2, 3]))
+    history = [
+        f"{condition} diagnosed {rng.randint(birth.year, reference_date.year)}"
+        for condition in history
+    ]
+    history += rng.sample(FAMILY_HISTORY, rng.choice([0, 1, 1, 2]))
+
+    yield "patients", {
+        "patient_id": patient_id,
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "date_of_birth": birth.isoformat(),
+        "created_at": registered.isoformat(),
+        "last_updated": (visit_times[-1] if visit_times else registered).isoformat(),
+        "medical_history": history,
+    }
+
+    for visit in visit_times:
+        notes = rng.choice(NOTE_TEMPLATES).format(
+            symptom=rng.choice(SYMPTOMS),
+            condition=rng.choice(CONDITIONS),
+            assessment=rng.choice(ASSESSMENTS),
+            weeks=rng.choice([2, 4, 6, 12]),
+        )
+        yield "consultations", consultation_record(
+            patient_id, rng.choice(DOCTORS), notes, now=visit
+        )
+
+    for medication in rng.sample(MEDICATIONS, min(int(rng.expovariate(1 / 1.5)), 6)):
+        prescribed = _random_time(rng, registered, reference_date)
+        status = "active" if rng.random() < 0.75 else "discontinued"
+        yield "medications", medication_record(
+            patient_id,
+            medication,
+            prescribed.strftime("%Y-%m-%d"),
+            status,
+            now=prescribed,
+        )
+
+    allergy_count = rng.choices([0, 1, 2, 3], weights=[70, 20, 8, 2])[0]
+    for allergen, notes in rng.sample(ALLERGENS, allergy_count):
+        severity = rng.choices(["mild", "moderate", "severe"], weights=[4, 4, 2])[0]
+        yield "allergies", allergy_record(
+            patient_id,
+            allergen,
+            severity,
+            notes,
+            now=_random_time(rng, registered, reference_date),
+        )
+
+    preferences = rng.sample(PREFERENCES, rng.choice([0, 1, 1, 2, 3]))
+    times = _distinct_times(rng, len(preferences), registered, reference_date)
+    for (category, preference, notes), created in zip(preferences, times):
+        yield "preferences", preference_record(
+            patient_id, category, preference, notes, now=created
+        )
+
+
+def generate(count, seed=42, start_id=100000, reference_date=None, records_scale=1.0):
+    """Yield (collection_name, document) pairs for count patients"""
+    if not records_scale > 0:
+        raise ValueError(f"records_scale must be greater than 0, got {records_scale}")
+    rng = random.Random(seed)
+    reference_date = reference_date or datetime(2025, 1, 1)
+    for patient_id in range(start_id, start_id + count):
+        yield from generate_patient(rng, patient_id, reference_date, records_scale)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("count", type=int, help="number of patients to generate")
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="JSON Lines file to write (default: stdout)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="random seed (default: 42)"
+    )
+    parser.add_argument(
+        "--start-id",
+        type=int,
+        default=100000,
+        help="first patient ID (default: 100000)",
+    )
+    parser.add_argument(
+        "--reference-date",
+        type=datetime.fromisoformat,
+        default=datetime(2025, 1, 1),
+        help="latest date any record can have (default: 2025-01-01)",
+    )
+    parser.add_argument(
+        "--records-scale",
+        type=float,
+        default=1.0,
+        help="multiplier for consultations per patient (default: 1.0)",
+    )
+    args = parser.parse_args()
+    if not args.records_scale > 0:
+        parser.error("--records-scale must be greater than 0")
+    return args
+
+
+def main():
+    """Main function to generate synthetic patient data"""
+    args = parse_args()
+    out = open(args.output, "w") if args.output else sys.stdout
+
+    counts = {}
+    try:
+        for collection_name, document in generate(
+            args.count,
+            args.seed,
+            args.start_id,
+            args.reference_date,
+            args.records_scale,
+        ):
+            out.write(json.dumps({"collection": collection_name, "document": document}))
+            out.write("\n")
+            counts[collection_name] = counts.get(collection_name, 0) + 1
+    finally:
+        if args.output:
+            out.close()
+
+    summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+    print(f"✅ Generated {summary}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Provision Couchbase Indexes Script
+Creates the GSI indexes used by PatientMemory, drops the ones earlier versions
+created that it no longer uses, and verifies with EXPLAIN that none of its
+queries falls back to a primary scan.
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import create_patient_memory
+
+# Load environment variables
+load_dotenv()
+
+# (index name, collection, index keys)
+INDEXES = [
+    ("idx_patients_patient_id", "patients", "patient_id, name"),
+    (
+        "idx_patients_recent",
+        "patients",
+        'IFMISSINGORNULL(last_seen, "") DESC, patient_id DESC, name',
+    ),
+    (
+        "idx_consultations_patient_order",
+        "consultations",
+        'patient_id, IFMISSINGORNULL(date, "") DESC, consultation_id DESC',
+    ),
+    (
+        "idx_medications_patient_order",
+        "medications",
+        'patient_id, IFMISSINGORNULL(prescribed_date, "") DESC, medication_id DESC',
+    ),
+    (
+        "idx_allergies_patient_order",
+        "allergies",
+        'patient_id, IFMISSINGORNULL(created_at, "") DESC, allergy_id DESC',
+    ),
+    (
+        "idx_preferences_patient_order",
+        "preferences",
+        'patient_id, IFMISSINGORNULL(created_at, "") DESC, preference_id DESC',
+    ),
+]
+
+# (index name, collection) of indexes earlier versions created. CREATE INDEX
+# IF NOT EXISTS never alters an index, so one whose keys change gets a new
+# name and the old one is dropped here.
+OBSOLETE_INDEXES = [
+    ("idx_patients_name_lower", "patients"),
+    ("idx_patients_last_seen", "patients"),
+    ("idx_consultations_patient_date", "consultations"),
+    ("idx_medications_patient_id", "medications"),
+    ("idx_allergies_patient_id", "allergies"),
+    ("idx_preferences_patient_id", "preferences"),
+]
+
+PRIMARY_SCAN_OPERATORS = {"PrimaryScan", "PrimaryScan3"}
+
+
+def create_indexes(memory):
+    """Create every secondary index PatientMemory relies on"""
+    for index_name, collection_name, keys in INDEXES:
+        query = (
+            f"CREATE INDEX IF NOT EXISTS {index_name} "
+            f"ON {memory._keyspace(collection_name)}({keys})"
+        )
+        try:
+            list(memory.cluster.query(query))
+            print(f"✅ {index_name} on {collection_name}({keys})")
+        except Exception as e:
+            print(f"❌ Error creating {index_name}: {e}")
+            raise
+
+
+def drop_obsolete_indexes(memory):
+    """Drop indexes superseded by INDEXES, so writes stop maintaining them"""
+    for index_name, collection_name in OBSOLETE_INDEXES:
+        query = (
+            f"DROP INDEX IF EXISTS {index_name} "
+            f"ON {memory._keyspace(collection_name)}"
+        )
+        try:
+            list(memory.cluster.query(query))
+            print(f"🗑️  {index_name} on {collection_name} dropped if present")
+        except Exception as e:
+            print(f"❌ Error dropping {index_name}: {e}")
+            raise
+
+
+def find_operators(plan, names):
+    """Recursively collect the plan operators whose name is in names"""
+    found = []
+    if isinstance(plan, dict):
+        if plan.get("#operator") in names:
+            found.append(plan)
+        for value in plan.values():
+            found.extend(find_operators(value, names))
+    elif isinstance(plan, list):
+        for item in plan:
+            found.extend(find_operators(item, names))
+    return found
+
+
+def verify_query_plans(memory):
+    """EXPLAIN every PatientMemory query; return the names of those using a primary scan"""
+    failures = []
+    for name, statement, args in memory.query_catalog():
+        plan = list(memory.cluster.query(f"EXPLAIN {statement}", *args))
+        primary_scans = find_operators(plan, PRIMARY_SCAN_OPERATORS)
+        if primary_scans:
+            keyspaces = sorted({scan.get("keyspace", "?") for scan in primary_scans})
+            print(f"❌ {name}: primary scan on {', '.join(keyspaces)}")
+            failures.append(name)
+        else:
+            print(f"✅ {name}: uses secondary indexes")
+    return failures
+
+
+def main():
+    """Main function to provision indexes and verify query plans"""
+    print("🗂️  MedicAI - Provisioning Couchbase Indexes")
+    print("=" * 50)
+
+    try:
+        patient_memory = create_patient_memory("couchbase")
+        create_indexes(patient_memory)
+        drop_obsolete_indexes(patient_memory)
+
+        print("\n🔍 Verifying query plans...")
+        failures = verify_query_plans(patient_memory)
+        if failures:
+            print(f"\n❌ {len(failures)} queries fall back to a primary scan")
+            sys.exit(1)
+
+        print("\n🎉 All PatientMemory queries are index-backed!")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
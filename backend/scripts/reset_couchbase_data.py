@@ -2,17 +2,29 @@
 """
 Reset Couchbase Data Script
 Deletes all existing data in collections and loads mock patient data.
+
+Input can be the grouped JSON format of mock_data/patients.json or a JSON
+Lines file with one {"collection": ..., "document": {...}} object per line,
+which is streamed so arbitrarily large datasets load in constant memory.
 """
 
+import argparse
 import os
-import json
 import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from dotenv import load_dotenv
 from couchbase.cluster import Cluster
 from couchbase.options import ClusterOptions
 from couchbase.auth import PasswordAuthenticator
-from couchbase.exceptions import DocumentNotFoundException
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patient_memory import run_mutation
+from records import COLLECTIONS, ID_FIELDS, iter_documents
+from storage import create_patient_memory
 
 # Load environment variables
 load_dotenv()
@@ -38,75 +50,140 @@ def connect_to_couchbase():
 
 
 def clear_collection(scope, collection_name, cluster, bucket_name):
-    """Clear all documents from a collection"""
+    """Clear all documents from a collection with a single DELETE statement"""
     print(f"Clearing {collection_name} collection...")
-    collection = scope.collection(collection_name)
 
     try:
-        # Query to get all document IDs in the collection
-        query = f"SELECT META().id FROM `{bucket_name}`.medicai.{collection_name}"
-        result = cluster.query(query)
+        query = f"DELETE FROM `{bucket_name}`.medicai.{collection_name}"
+        start = time.perf_counter()
+        deleted = run_mutation(cluster, query)
+        elapsed = time.perf_counter() - start
+        print(
+            f"✅ Cleared {deleted} documents from {collection_name} "
+            f"({_rate(deleted, elapsed)})"
+        )
+
+    except Exception as e:
+        print(f"⚠️  Error clearing {collection_name}: {e}")
 
-        doc_ids = [row["id"] for row in result]
-        print(f"Found {len(doc_ids)} documents in {collection_name}")
 
-        # Delete each document
-        for doc_id in doc_ids:
-            try:
-                collection.remove(doc_id)
-            except DocumentNotFoundException:
-                pass  # Document already deleted
+def document_id(collection_name, item):
+    """Determine document ID based on collection type"""
+    if collection_name == "patients":
+        return str(item["patient_id"])
+    return item[ID_FIELDS[collection_name]]
 
-        print(f"✅ Cleared {len(doc_ids)} documents from {collection_name}")
 
+def _upsert_batch(collection_obj, batch):
+    """Upsert one batch and return (written, failed) counts"""
+    try:
+        result = collection_obj.upsert_multi(batch)
     except Exception as e:
-        print(f"⚠️  Error clearing {collection_name}: {e}")
+        print(f"Error inserting batch of {len(batch)}: {e}")
+        return 0, len(batch)
+    for doc_id, exc in result.exceptions.items():
+        print(f"Error inserting {doc_id}: {exc}")
+    return len(batch) - len(result.exceptions), len(result.exceptions)
+
+
+def _rate(count, elapsed):
+    return f"{count / elapsed:,.0f} docs/s" if elapsed > 0 else "n/a docs/s"
 
 
-def load_mock_data(scope, data_file_path):
-    """Load mock data from JSON file into collections"""
+def load_mock_data(scope, data_file_path, batch_size=500, parallelism=8):
+    """
+    Load mock data into collections using concurrent batched upserts.
+
+    At most 2 * parallelism batches are in flight at once, so memory stays
+    bounded while streaming large JSON Lines files.
+
+    Returns:
+        Dict of collection name -> number of documents written
+    """
     print(f"Loading mock data from {data_file_path}...")
 
-    with open(data_file_path, "r") as f:
-        data = json.load(f)
-
-    collections = {
-        "patients": scope.collection("patients"),
-        "consultations": scope.collection("consultations"),
-        "medications": scope.collection("medications"),
-        "allergies": scope.collection("allergies"),
-        "preferences": scope.collection("preferences"),
-    }
-
-    # Load data for each collection
-    for collection_name, collection_obj in collections.items():
-        if collection_name in data:
-            items = data[collection_name]
-            print(f"Loading {len(items)} items into {collection_name}...")
-
-            for item in items:
-                # Determine document ID based on collection type
-                if collection_name == "patients":
-                    doc_id = str(item["patient_id"])
-                elif collection_name == "consultations":
-                    doc_id = item["consultation_id"]
-                elif collection_name == "medications":
-                    doc_id = item["medication_id"]
-                elif collection_name == "allergies":
-                    doc_id = item["allergy_id"]
-                elif collection_name == "preferences":
-                    doc_id = item["preference_id"]
-
-                try:
-                    collection_obj.upsert(doc_id, item)
-                except Exception as e:
-                    print(f"Error inserting {doc_id}: {e}")
-
-            print(f"✅ Loaded {len(items)} items into {collection_name}")
+    collections = {name: scope.collection(name) for name in COLLECTIONS}
+    written = defaultdict(int)
+    failed = 0
+    pending = {}  # future -> collection name
+    batches = defaultdict(dict)
+    start = time.perf_counter()
+
+    def drain(max_pending):
+        nonlocal failed
+        while len(pending) > max_pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ok, bad = future.result()
+                written[pending.pop(future)] += ok
+                failed += bad
+
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+
+        def submit(collection_name):
+            batch = batches.pop(collection_name)
+            future = executor.submit(_upsert_batch, collections[collection_name], batch)
+            pending[future] = collection_name
+            drain(2 * parallelism)
+
+        for collection_name, item in iter_documents(data_file_path):
+            if collection_name not in collections:
+                print(f"Skipping document for unknown collection {collection_name}")
+                continue
+            batches[collection_name][document_id(collection_name, item)] = item
+            if len(batches[collection_name]) >= batch_size:
+                submit(collection_name)
+
+        for collection_name in list(batches):
+            submit(collection_name)
+        drain(0)
+
+    elapsed = time.perf_counter() - start
+    for collection_name in COLLECTIONS:
+        if written[collection_name]:
+            print(f"✅ Loaded {written[collection_name]} items into {collection_name}")
+
+    total = sum(written.values())
+    print(f"📈 Loaded {total} documents in {elapsed:.2f}s ({_rate(total, elapsed)})")
+    if failed:
+        print(f"⚠️  {failed} documents failed to load")
+
+    return dict(written)
+
+
+def parse_args():
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--data",
+        type=Path,
+        default=script_dir / "mock_data" / "patients.json",
+        help="JSON or JSON Lines (.jsonl) file to load (default: mock patients)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="documents per upsert_multi call (default: 500)",
+    )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=8,
+        help="concurrent upsert batches (default: 8)",
+    )
+    parser.add_argument(
+        "--no-clear",
+        action="store_true",
+        help="load on top of existing data instead of clearing collections first",
+    )
+    return parser.parse_args()
 
 
 def main():
     """Main function to reset Couchbase data"""
+    args = parse_args()
+
     print("🔄 MedicAI - Resetting Couchbase Data")
     print("=" * 50)
 
@@ -117,33 +194,36 @@ def main():
         print("✅ Connected to Couchbase")
 
         # Clear all collections
-        collections_to_clear = [
-            "patients",
-            "consultations",
-            "medications",
-            "allergies",
-            "preferences",
-        ]
-        for collection_name in collections_to_clear:
-            clear_collection(scope, collection_name, cluster, bucket_name)
+        if not args.no_clear:
+            for collection_name in COLLECTIONS:
+                clear_collection(scope, collection_name, cluster, bucket_name)
 
         print("\n📥 Loading mock data...")
 
-        # Load mock data
-        script_dir = Path(__file__).parent
-        data_file = script_dir / "mock_data" / "patients.json"
-
+        data_file = args.data
         if not data_file.exists():
             print(f"❌ Mock data file not found: {data_file}")
             sys.exit(1)
 
-        load_mock_data(scope, data_file)
+        load_mock_data(
+            scope,
+            data_file,
+            batch_size=args.batch_size,
+            parallelism=args.parallelism,
+        )
+
+        # Loaded documents carry no last_seen; derive it from consultations
+        print("\n🕒 Backfilling last_seen...")
+        patient_memory = create_patient_memory("couchbase")
+        patient_memory.backfill_last_seen()
+        patient_memory.close()
 
         print("\n🎉 Data reset complete!")
-        print("\nLoaded patients:")
-        print("- Brigid O'Sullivan (ID: 12345) - 72yo, from Kerry, diabetes")
-        print("- Cian Murphy (ID: 12346) - 20yo, UCD student, from Sligo")
-        print("- Orla Flanagan (ID: 12347) - 33yo, UX Designer, from Cork")
+        if data_file.name == "patients.json":
+            print("\nLoaded patients:")
+            print("- Brigid O'Sullivan (ID: 12345) - 72yo, from Kerry, diabetes")
+            print("- Cian Murphy (ID: 12346) - 20yo, UCD student, from Sligo")
+            print("- Orla Flanagan (ID: 12347) - 33yo, UX Designer, from Cork")
 
     except Exception as e:
         print(f"❌ Error: {e}")
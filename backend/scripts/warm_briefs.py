@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Brief Warming Script
+Sends the day's appointment list (one patient ID or name per line) to a
+running MedicAI API, which pre-generates the patients' brief narratives in the
+background so /brief/narrative serves them from cache during the clinic.
+
+Usage: python scripts/warm_briefs.py appointments.txt [api_url]
+"""
+
+import json
+import os
+import sys
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointments import read_patient_list
+
+DEFAULT_API_URL = "http://localhost:8000/api/v1"
+
+
+def main():
+    """Main function to start warming briefs for an appointment list"""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    api_url = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_API_URL
+
+    print("🔥 MedicAI - Warming patient briefs")
+    print("=" * 50)
+
+    try:
+        patient_ids = read_patient_list(sys.argv[1])
+        request = urllib.request.Request(
+            f"{api_url}/briefs/warm",
+            data=json.dumps({"patient_ids": patient_ids}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request) as response:
+            result = json.load(response)
+        print(f"\n🎉 {result['message']}")
+        print(f"Check progress at {api_url}/briefs/warm")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,60 @@
 #!/usr/bin/env python3
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import uvicorn
 
-from api_routes import router as api_router
+from startup import timed, print_startup_report
+
+with timed("import api routes"):
+    from api_routes import router as api_router
+
+import medical_agent
+import storage
+from appointments import read_patient_list
+from brief_warmer import brief_warmer
 
 load_dotenv()
 
+# Set MEDICAI_WARM_UP=0 to skip connecting at startup and pay the cost on
+# the first request instead
+WARM_UP = os.getenv("MEDICAI_WARM_UP", "1") != "0"
+
+# Readiness fails when any store round trip is slower than this, or when the
+# probe as a whole takes longer than the timeout
+READY_MAX_LATENCY_MS = float(os.getenv("READY_MAX_LATENCY_MS", "250"))
+READY_TIMEOUT_S = float(os.getenv("READY_TIMEOUT_S", "2"))
+
+# Appointment list (one patient ID or name per line) whose brief narratives
+# are pre-generated in the background at startup
+BRIEF_WARM_FILE = os.getenv("BRIEF_WARM_FILE")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the patient store and agent runner for the life of the worker"""
+    if WARM_UP:
+        # Connect the store and build the agent concurrently, off the loop
+        await asyncio.gather(
+            asyncio.to_thread(storage.warm_up),
+            asyncio.to_thread(medical_agent.warm_up),
+        )
+    print_startup_report()
+    if BRIEF_WARM_FILE:
+        brief_warmer.start(read_patient_list(BRIEF_WARM_FILE))
+    yield
+    await brief_warmer.stop()
+    await medical_agent.shutdown()
+    await asyncio.to_thread(storage.close_patient_memory)
+
 app = FastAPI(
     title="MedicAI API",
     description="AI-powered medical memory system API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -33,6 +75,34 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "medicai-api"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: fails when the patient store is unreachable or slow"""
+    try:
+        latencies = await asyncio.wait_for(
+            asyncio.to_thread(storage.check_health), timeout=READY_TIMEOUT_S
+        )
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": "unavailable",
+                "error": f"ping timed out after {READY_TIMEOUT_S}s",
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=503, content={"status": "unavailable", "error": str(e)}
+        )
+
+    slow = {check: ms for check, ms in latencies.items() if ms > READY_MAX_LATENCY_MS}
+    if slow:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "degraded", "latency_ms": latencies, "slow": slow},
+        )
+    return {"status": "ready", "service": "medicai-api", "latency_ms": latencies}
+
 if __name__ == "__main__":
     uvicorn.run(
         "server:app",
@@ -40,4 +110,4 @@ if __name__ == "__main__":
         port=8000,
         reload=True,
         log_level="info"
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,214 @@
+import json
+
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+# Marks the text part carrying the summary of compacted turns
+SUMMARY_PREFIX = "[Summary of earlier conversation]"
+
+# Rough size of a Gemini token in characters, for budgeting without an API
+# call per event
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _parts(event) -> list:
+    if event.content is None:
+        return []
+    return event.content.parts or []
+
+
+def event_tokens(event) -> int:
+    """Approximate tokens an event adds to the prompt, including tool payloads"""
+    size = 0
+    for part in _parts(event):
+        if getattr(part, "text", None):
+            size += estimate_tokens(part.text)
+        if getattr(part, "function_call", None):
+            call = part.function_call
+            size += estimate_tokens(f"{call.name}{json.dumps(call.args, default=str)}")
+        if getattr(part, "function_response", None):
+            response = part.function_response
+            size += estimate_tokens(
+                f"{response.name}{json.dumps(response.response, default=str)}"
+            )
+    return size
+
+
+def _is_user_message(event) -> bool:
+    """Whether an event is a doctor's message, i.e. the start of a turn"""
+    return event.author == "user" and any(
+        getattr(part, "text", None) for part in _parts(event)
+    )
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def summarize_turn(events) -> str:
+    """One-line extractive summary of a turn: question, tools used, answer"""
+    question, answer, tools = "", "", []
+    for event in events:
+        for part in _parts(event):
+            text = getattr(part, "text", None)
+            if text and not text.startswith(SUMMARY_PREFIX):
+                if event.author == "user":
+                    question = text
+                else:
+                    answer = text
+            if getattr(part, "function_call", None):
+                call = part.function_call
+                args = ", ".join(str(value) for value in (call.args or {}).values())
+                tools.append(f"{call.name}({_shorten(args, 60)})")
+
+    line = f"- Doctor: {_shorten(question, 200)}"
+    if tools:
+        line += f" | Tools: {'; '.join(tools)}"
+    if answer:
+        line += f" | Assistant: {_shorten(answer, 300)}"
+    return line
+
+
+class CompactingInMemorySessionService(InMemorySessionService):
+    """
+    In-memory ADK session service with bounded, compacted history.
+
+    Once a session's history exceeds token_budget tokens (or max_events
+    events), its oldest whole turns are replaced by a short extractive
+    summary, while the most recent keep_turns turns stay verbatim. The
+    summary rides along as the first part of the oldest kept doctor message,
+    so turns still alternate and a tool response never loses its call.
+    The prompt replayed to Gemini on each message therefore stays roughly
+    flat however long the conversation runs.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 8000,
+        keep_turns: int = 4,
+        summary_budget: int = 1000,
+        max_events: int = 200,
+    ):
+        """
+        Args:
+            token_budget: Estimated tokens of history kept per session
+            keep_turns: Most recent turns never compacted
+            summary_budget: Estimated tokens of summary kept; the oldest
+                summary lines are dropped beyond it. Capped at half the
+                token_budget so the summary cannot crowd out recent turns
+            max_events: Hard cap on events kept per session
+        """
+        super().__init__()
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_budget = min(summary_budget, token_budget // 2)
+        self.max_events = max_events
+        self._summaries = {}  # (app_name, user_id, session_id) -> summary lines
+        self._counters = {}  # (app_name, user_id, session_id) -> counters
+
+    async def append_event(self, session, event):
+        event = await super().append_event(session, event)
+        if not event.partial:
+            stored = (
+                self.sessions.get(session.app_name, {})
+                .get(session.user_id, {})
+                .get(session.id)
+            )
+            if stored is not None:
+                self._compact(stored)
+        return event
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str):
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        self._summaries.pop((app_name, user_id, session_id), None)
+        self._counters.pop((app_name, user_id, session_id), None)
+
+    def _compact(self, stored):
+        key = (stored.app_name, stored.user_id, stored.id)
+        events = stored.events
+        sizes = [event_tokens(event) for event in events]
+        if sum(sizes) <= self.token_budget and len(events) <= self.max_events:
+            return
+
+        # Cut only at turn starts, keeping at least keep_turns turns, at the
+        # first point where what remains fits the budget
+        starts = [i for i, event in enumerate(events) if _is_user_message(event)]
+        cuts = starts[1 : max(1, len(starts) - self.keep_turns + 1)]
+        if not cuts:
+            return
+        cut = cuts[-1]
+        for candidate in cuts:
+            if (
+                sum(sizes[candidate:]) + self.summary_budget <= self.token_budget
+                and len(events) - candidate <= self.max_events
+            ):
+                cut = candidate
+                break
+
+        # Summarize the dropped turns onto the existing summary
+        lines = self._summaries.get(key, [])
+        bounds = [i for i in starts if i < cut] + [cut]
+        if bounds[0] > 0:
+            bounds.insert(0, 0)
+        for begin, end in zip(bounds, bounds[1:]):
+            lines.append(summarize_turn(events[begin:end]))
+        while (
+            len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget
+        ):
+            lines.pop(0)
+        self._summaries[key] = lines
+
+        # The runner works on its own copy of the session, so this takes
+        # effect from the next message on
+        first = events[cut]
+        summary = types.Part(text=f"{SUMMARY_PREFIX}\n" + "\n".join(lines))
+        kept_parts = [
+            part
+            for part in _parts(first)
+            if not (getattr(part, "text", None) or "").startswith(SUMMARY_PREFIX)
+        ]
+        first = first.model_copy(
+            update={
+                "content": types.Content(
+                    role=first.content.role, parts=[summary] + kept_parts
+                )
+            }
+        )
+        stored.events = [first] + events[cut + 1 :]
+
+        counters = self._counters.setdefault(
+            key, {"compactions": 0, "compacted_events": 0, "compacted_tokens": 0}
+        )
+        counters["compactions"] += 1
+        counters["compacted_events"] += cut
+        counters["compacted_tokens"] += sum(sizes[:cut])
+
+    def session_stats(self, app_name: str, user_id: str, session_id: str) -> dict:
+        """
+        Size of a session's history as it will be sent to the model.
+
+        Returns:
+            Dict with events and estimated tokens kept, summary tokens, and
+            how many compactions have run, or None for an unknown session
+        """
+        stored = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if stored is None:
+            return None
+        key = (app_name, user_id, session_id)
+        summary = "\n".join(self._summaries.get(key, []))
+        return {
+            "events": len(stored.events),
+            "tokens": sum(event_tokens(event) for event in stored.events),
+            "summary_tokens": estimate_tokens(summary) if summary else 0,
+            **self._counters.get(
+                key, {"compactions": 0, "compacted_events": 0, "compacted_tokens": 0}
+            ),
+        }
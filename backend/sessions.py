@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class SessionRegistry:
+    """
+    Agent sessions keyed by (doctor, patient).
+
+    Each doctor gets a separate conversation per patient (plus one with no
+    patient for general questions), so concurrent doctors never share
+    history and a prompt only carries the context of the patient at hand.
+    Sessions idle for longer than idle_timeout seconds are deleted, and at
+    most max_sessions are kept, least recently used going first.
+    """
+
+    def __init__(
+        self,
+        app_name: str,
+        session_service,
+        idle_timeout: float = 1800,
+        max_sessions: int = 1000,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            app_name: ADK app name the sessions belong to
+            session_service: Zero-argument callable returning the ADK session
+                service, so the agent is only built when a session is needed
+            idle_timeout: Seconds of inactivity before a session is dropped
+            max_sessions: Maximum number of live sessions
+            clock: Time source, replaceable in tests
+        """
+        self.app_name = app_name
+        self._session_service = session_service
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions = (
+            OrderedDict()
+        )  # (doctor_id, patient_id) -> (session_id, last_used)
+        self._lock = asyncio.Lock()
+        self.created = 0
+        self.evictions = 0
+
+    async def session_for(self, doctor_id: str, patient_id=None) -> str:
+        """
+        Return the session ID for a doctor/patient pair, creating it if needed.
+
+        Args:
+            doctor_id: Doctor the conversation belongs to (the ADK user ID)
+            patient_id: Patient the conversation is about, or None
+
+        Returns:
+            ADK session ID to pass to the agent
+        """
+        key = (doctor_id, None if patient_id is None else str(patient_id))
+        async with self._lock:
+            now = self._clock()
+            await self._evict_idle(now)
+
+            entry = self._sessions.get(key)
+            if entry is None:
+                session = await self._session_service().create_session(
+                    app_name=self.app_name, user_id=doctor_id
+                )
+                session_id = session.id
+                self.created += 1
+            else:
+                session_id = entry[0]
+
+            self._sessions[key] = (session_id, now)
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                oldest = next(iter(self._sessions))
+                await self._drop(oldest)
+            return session_id
+
+    async def _evict_idle(self, now: float):
+        # Entries are kept in last-used order, so idle ones are at the front
+        while self._sessions:
+            key, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            await self._drop(key)
+
+    async def _drop(self, key):
+        session_id, _ = self._sessions.pop(key)
+        self.evictions += 1
+        try:
+            await self._session_service().delete_session(
+                app_name=self.app_name, user_id=key[0], session_id=session_id
+            )
+        except Exception as e:
+            print(f"[Sessions] Error deleting session {session_id}: {e}")
+
+    async def clear(self):
+        """Delete every session held by the registry"""
+        async with self._lock:
+            while self._sessions:
+                await self._drop(next(iter(self._sessions)))
+
+    def describe(self) -> list:
+        """
+        Live sessions, most recently used last.
+
+        Returns:
+            List of dicts with doctor_id, patient_id, session_id and idle
+            seconds, plus the history size reported by the session service
+            (events, estimated tokens, compactions) when it supports it
+        """
+        now = self._clock()
+        entries = list(self._sessions.items())
+        stats_for = None
+        if entries:
+            stats_for = getattr(self._session_service(), "session_stats", None)
+
+        sessions = []
+        for (doctor_id, patient_id), (session_id, last_used) in entries:
+            entry = {
+                "doctor_id": doctor_id,
+                "patient_id": patient_id,
+                "session_id": session_id,
+                "idle_s": round(now - last_used, 1),
+            }
+            if stats_for is not None:
+                entry.update(stats_for(self.app_name, doctor_id, session_id) or {})
+            sessions.append(entry)
+        return sessions
+
+    def stats(self) -> dict:
+        """Live session count and lifetime created/evicted counters"""
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "evictions": self.evictions,
+        }
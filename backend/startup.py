@@ -0,0 +1,32 @@
+import time
+from contextlib import contextmanager
+
+# (label, seconds) for every timed startup step, in the order they ran
+_timings = []
+
+
+@contextmanager
+def timed(label: str):
+    """Record how long the wrapped startup step takes"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings.append((label, time.perf_counter() - start))
+
+
+def startup_report() -> dict:
+    """Startup step durations in milliseconds, plus their total"""
+    steps = {label: round(seconds * 1000, 1) for label, seconds in _timings}
+    return {
+        "steps_ms": steps,
+        "total_ms": round(sum(seconds for _, seconds in _timings) * 1000, 1),
+    }
+
+
+def print_startup_report():
+    report = startup_report()
+    print("[Startup] Import and connect costs:")
+    for label, ms in report["steps_ms"].items():
+        print(f"[Startup]   {label:<32} {ms:>8.1f} ms")
+    print(f"[Startup]   {'total':<32} {report['total_ms']:>8.1f} ms")
@@ -0,0 +1,115 @@
+import os
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+
+from patient_store import PatientStore
+from startup import timed
+
+load_dotenv()
+
+DEFAULT_MEMORY_DATA = Path(__file__).parent / "scripts" / "mock_data" / "patients.json"
+
+
+def create_patient_memory(backend: str = None) -> PatientStore:
+    """
+    Create the patient store selected by configuration.
+
+    Args:
+        backend: "couchbase" or "memory"; defaults to the MEDICAI_STORAGE
+            environment variable, then "couchbase"
+
+    The memory backend is seeded from MEDICAI_MEMORY_DATA (a JSON or JSON
+    Lines dataset), defaulting to the bundled mock patients.
+    """
+    backend = (backend or os.getenv("MEDICAI_STORAGE") or "couchbase").lower()
+
+    if backend == "couchbase":
+        with timed("import couchbase SDK"):
+            from patient_memory import PatientMemory
+
+        return PatientMemory(
+            conn_str=os.getenv("COUCHBASE_CONN_STR"),
+            username=os.getenv("COUCHBASE_USERNAME"),
+            password=os.getenv("COUCHBASE_PASSWORD"),
+            bucket_name=os.getenv("COUCHBASE_BUCKET"),
+            profile_cache_size=int(os.getenv("PROFILE_CACHE_SIZE", "1024")),
+            profile_cache_ttl=float(os.getenv("PROFILE_CACHE_TTL", "300")),
+            name_index_ttl=float(os.getenv("NAME_INDEX_TTL", "300")),
+            profile_consultations=int(os.getenv("PROFILE_CONSULTATIONS", "10")),
+        )
+
+    if backend == "memory":
+        from memory_store import InMemoryPatientMemory
+        from records import iter_documents
+
+        store = InMemoryPatientMemory(
+            profile_consultations=int(os.getenv("PROFILE_CONSULTATIONS", "10"))
+        )
+        data_file = os.getenv("MEDICAI_MEMORY_DATA") or DEFAULT_MEMORY_DATA
+        count = store.load(iter_documents(data_file))
+        print(f"[Memory System] Loaded {count} documents into in-process store")
+        return store
+
+    raise ValueError(f"Unknown MEDICAI_STORAGE backend: {backend}")
+
+
+_patient_memory = None
+_patient_memory_lock = threading.Lock()
+
+
+def get_patient_memory() -> PatientStore:
+    """Return the shared patient store, connecting on first use"""
+    global _patient_memory
+    if _patient_memory is None:
+        with _patient_memory_lock:
+            if _patient_memory is None:
+                with timed("connect patient store"):
+                    _patient_memory = create_patient_memory()
+    return _patient_memory
+
+
+def close_patient_memory():
+    """Close the shared patient store; the next use connects afresh"""
+    global _patient_memory
+    with _patient_memory_lock:
+        store, _patient_memory = _patient_memory, None
+    if store is not None:
+        store.close()
+
+
+_health_probe_lock = threading.Lock()
+
+
+def check_health() -> dict:
+    """
+    Ping the shared patient store.
+
+    Only one ping runs at a time: a probe that times out keeps its thread
+    until the ping returns, so while one is in flight further probes fail
+    at once instead of piling up threads. A failed ping leaves the store
+    open, since the SDK reconnects on its own and requests in flight share
+    the handle.
+
+    Raises:
+        RuntimeError: If a previous ping is still in flight
+    """
+    if not _health_probe_lock.acquire(blocking=False):
+        raise RuntimeError("previous ping still in progress")
+    try:
+        return get_patient_memory().ping()
+    finally:
+        _health_probe_lock.release()
+
+
+def warm_up():
+    """Connect the shared patient store ahead of the first request"""
+    get_patient_memory()
+
+
+def __getattr__(name):
+    # Keeps `from storage import patient_memory` working without connecting
+    # at import time
+    if name == "patient_memory":
+        return get_patient_memory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
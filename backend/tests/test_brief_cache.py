@@ -0,0 +1,39 @@
+"""
+Tests for the content-addressed AI brief cache
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brief_cache import BriefCache
+
+
+def test_changed_content_misses():
+    """Test that a brief is reused only while its source content is unchanged"""
+    cache = BriefCache()
+    cache.set(12345, "narrative", "brief v1", "Narrative one")
+
+    assert cache.get(12345, "narrative", "brief v1") == "Narrative one"
+    assert cache.get(12345, "narrative", "brief v2") is None
+    assert cache.get(12345, "prep", "brief v1") is None
+    assert cache.get(12346, "narrative", "brief v1") is None
+
+
+def test_persistent_store_survives_restart(tmp_path):
+    """Test that the SQLite backing serves entries to a fresh cache"""
+    path = str(tmp_path / "briefs.db")
+    cache = BriefCache(path=path)
+    cache.set(12345, "narrative", "brief v1", "Narrative one")
+    cache.set(12345, "narrative", "brief v2", "Narrative two")
+    cache.close()
+
+    reopened = BriefCache(path=path)
+    assert reopened.get(12345, "narrative", "brief v2") == "Narrative two"
+    # Superseded versions are dropped from the store
+    assert reopened.get(12345, "narrative", "brief v1") is None
+    stats = reopened.stats()
+    assert stats["stored"] == 1
+    assert stats["store_hits"] == 1
+    reopened.close()
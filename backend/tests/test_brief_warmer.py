@@ -0,0 +1,75 @@
+"""
+Tests for pre-consultation brief warming
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brief_warmer import BriefWarmer
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+def test_concurrency_and_pacing():
+    """Test that warming respects the concurrency limit and call spacing"""
+    fake = FakeTime()
+    active, peak, starts = 0, 0, []
+
+    async def warm(patient_id, before_model):
+        nonlocal active, peak
+        if patient_id == "cached":
+            return "cached"
+        await before_model()
+        starts.append(fake.now)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0)
+        active -= 1
+        return "warmed"
+
+    warmer = BriefWarmer(
+        warm, concurrency=2, min_interval=5, clock=fake.clock, sleep=fake.sleep
+    )
+    run = asyncio.run(warmer.warm(["1", "2", "cached", "3", "2", "4"]))
+
+    assert run["requested"] == 5
+    assert (run["warmed"], run["cached"], run["failed"]) == (4, 1, 0)
+    assert peak <= 2
+    assert all(b - a >= 5 for a, b in zip(starts, starts[1:]))
+
+
+def test_failures_are_recorded_without_retrying():
+    """Test that a failed patient, rate limited or not, is not retried by the warmer"""
+    fake = FakeTime()
+    calls = []
+
+    async def warm(patient_id, before_model):
+        await before_model()
+        calls.append(patient_id)
+        if patient_id == "1":
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        if patient_id == "bad":
+            raise LookupError("Patient not found: bad")
+        return "warmed"
+
+    warmer = BriefWarmer(
+        warm, concurrency=1, min_interval=1, clock=fake.clock, sleep=fake.sleep
+    )
+    run = asyncio.run(warmer.warm(["1", "bad", "2"]))
+
+    assert calls == ["1", "bad", "2"]
+    assert run["warmed"] == 1 and run["failed"] == 2 and run["rate_limited"] == 1
+    assert set(run["errors"]) == {"1", "bad"}
@@ -0,0 +1,84 @@
+"""
+Tests for the in-process LRU/TTL cache
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_order():
+    """Test that the least recently used entry is evicted first"""
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    """Test that entries expire after their TTL"""
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_and_counters():
+    """Test invalidation and hit/miss accounting"""
+    cache = LRUCache(max_size=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.invalidate("a") is True
+    assert cache.invalidate("a") is False
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 0
+
+
+def test_zero_size_disables_cache():
+    """Test that a max_size of 0 never stores anything"""
+    cache = LRUCache(max_size=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_membership_check_does_not_count():
+    """Test that `in` reports live entries without touching counters or order"""
+    clock = FakeClock()
+    cache = LRUCache(max_size=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert "a" in cache
+    assert "missing" not in cache
+    cache.set("c", 3)  # "a" is still least recently used
+    assert "a" not in cache
+    clock.now = 10
+    assert "b" not in cache
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
@@ -0,0 +1,169 @@
+"""
+Tests for the rate-limit-aware LLM scheduler
+"""
+
+import asyncio
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_scheduler import BACKGROUND, INTERACTIVE, LLMScheduler, SchedulerBusy
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        # Let woken callers run before the clock moves on
+        await asyncio.sleep(0)
+        self.now += seconds
+
+
+def scheduler(fake, **kwargs):
+    return LLMScheduler(clock=fake.clock, sleep=fake.sleep, jitter=lambda: 0.5, **kwargs)
+
+
+def test_token_bucket_paces_admission():
+    """Test that after the burst, calls are admitted at the configured rate"""
+    fake = FakeTime()
+    llm = scheduler(fake, requests_per_minute=60, burst=2)
+    admitted = []
+
+    async def call(n):
+        await llm.acquire(INTERACTIVE)
+        admitted.append((n, fake.now))
+
+    async def run():
+        await asyncio.gather(*(call(n) for n in range(5)))
+
+    asyncio.run(run())
+    times = [t for _, t in admitted]
+    assert times[:2] == [0.0, 0.0]
+    assert times[2:] == pytest.approx([1.0, 2.0, 3.0])
+    assert llm.stats()["peak_queue_depth"] == 3
+
+
+def test_interactive_requests_go_first():
+    """Test that queued interactive calls are admitted before background ones"""
+    fake = FakeTime()
+    llm = scheduler(fake, requests_per_minute=60, burst=1)
+    order = []
+
+    async def call(name, priority):
+        await llm.acquire(priority)
+        order.append(name)
+
+    async def run():
+        await llm.acquire(INTERACTIVE)  # use up the burst
+        background = [asyncio.create_task(call(f"bg{n}", BACKGROUND)) for n in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("chat", INTERACTIVE))
+        await asyncio.gather(*background, interactive)
+
+    asyncio.run(run())
+    assert order == ["chat", "bg0", "bg1"]
+
+
+def test_rate_limit_is_retried_after_backoff():
+    """Test that a 429 pauses admission and the call is retried"""
+    fake = FakeTime()
+    llm = scheduler(fake, requests_per_minute=600, burst=5, base_delay=4)
+    attempts = []
+
+    async def flaky():
+        attempts.append(fake.now)
+        if len(attempts) < 3:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        return "ok"
+
+    async def flaky_stream():
+        yield await flaky()
+
+    async def run():
+        return [response async for response in llm.stream(flaky_stream)]
+
+    assert asyncio.run(run()) == ["ok"]
+    # Backoffs of 4s then 8s, each with jitter 0.5 -> 3s and 6s
+    assert attempts == pytest.approx([0.0, 3.0, 9.0])
+    stats = llm.stats()
+    assert stats["retries"] == 2 and stats["rate_limited"] == 2
+
+
+def test_full_queue_rejects_new_calls():
+    """Test admission control once max_queue calls are waiting"""
+    fake = FakeTime()
+    llm = scheduler(fake, requests_per_minute=60, burst=1, max_queue=1)
+
+    async def run():
+        await llm.acquire()
+        waiting = asyncio.create_task(llm.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerBusy):
+            await llm.acquire()
+        await waiting
+
+    asyncio.run(run())
+    assert llm.stats()["rejected"] == 1
+
+
+def test_scheduled_gemini_retries_through_the_scheduler(monkeypatch):
+    """Test the agent's model retries a 429 but not a failure mid-stream"""
+    from google.adk.models.google_llm import Gemini
+
+    import scheduled_model
+
+    fake = FakeTime()
+    llm = scheduler(fake, requests_per_minute=600, burst=5, base_delay=4)
+    monkeypatch.setattr(scheduled_model, "llm_scheduler", llm)
+    attempts = []
+
+    async def parent(self, llm_request, stream=False):
+        attempts.append(fake.now)
+        if llm_request == "rate limited" and len(attempts) == 1:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        yield "chunk"
+        if llm_request == "fails mid-stream":
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        yield "done"
+
+    monkeypatch.setattr(Gemini, "generate_content_async", parent)
+    model = scheduled_model.ScheduledGemini(model="gemini-test")
+
+    async def collect(request):
+        return [r async for r in model.generate_content_async(request, stream=True)]
+
+    assert asyncio.run(collect("rate limited")) == ["chunk", "done"]
+    assert attempts == pytest.approx([0.0, 3.0])
+
+    attempts.clear()
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect("fails mid-stream"))
+    assert len(attempts) == 1
+    assert llm.stats()["retries"] == 1
+
+
+def test_cancelled_callers_leave_the_queue():
+    """Test that callers who gave up waiting do not fill the queue"""
+    fake = FakeTime()
+    llm = scheduler(fake, requests_per_minute=60, burst=1, max_queue=2)
+
+    async def run():
+        await llm.acquire()
+        gave_up = [asyncio.create_task(llm.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        for task in gave_up:
+            task.cancel()
+        await asyncio.gather(*gave_up, return_exceptions=True)
+
+        assert llm.stats()["queue_depth"] == 0
+        await asyncio.gather(llm.acquire(), llm.acquire())
+
+    asyncio.run(run())
+    assert llm.stats()["rejected"] == 0
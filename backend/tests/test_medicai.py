@@ -2,12 +2,14 @@
 Test suite for MedicAI patient memory system
 """
 
+import asyncio
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from patient_memory import patient_memory
+from storage import patient_memory
+from models import PatientBriefResponse
 from medical_tools import (
     get_patient_brief,
     add_consultation_notes,
@@ -34,6 +36,12 @@ def test_get_patient_profile_not_found():
     assert profile is None
 
 
+def test_patient_exists():
+    """Test the cheap patient existence check"""
+    assert patient_memory.patient_exists(12345) is True
+    assert patient_memory.patient_exists(99999) is False
+
+
 def test_get_patient_by_name():
     """Test finding patient by name"""
     patient = patient_memory.get_patient_by_name("Brigid O'Sullivan")
@@ -75,7 +83,7 @@ def test_list_recent_patients():
 
 def test_get_patient_brief_by_id():
     """Test getting patient brief by ID"""
-    result = get_patient_brief("12345")
+    result = asyncio.run(get_patient_brief("12345"))
 
     assert result["status"] == "success"
     assert "patient_brief" in result
@@ -84,16 +92,41 @@ def test_get_patient_brief_by_id():
 
 def test_get_patient_brief_by_name():
     """Test getting patient brief by name"""
-    result = get_patient_brief("Orla Flanagan")
+    result = asyncio.run(get_patient_brief("Orla Flanagan"))
 
     assert result["status"] == "success"
     assert "patient_brief" in result
     assert result["patient_brief"]["patient_info"]["patient_id"] == 12347
 
 
+def test_get_patient_brief_alerts_view():
+    """Test that a named view returns only the fields its screen needs"""
+    result = asyncio.run(get_patient_brief("12345", view="alerts"))
+
+    assert result["status"] == "success"
+    brief = result["patient_brief"]
+    assert set(brief) == {"patient_info", "allergies"}
+    assert set(brief["patient_info"]) == {"patient_id", "name"}
+    assert all("allergen" in allergy for allergy in brief["allergies"])
+
+    # The API response leaves out the other sections instead of sending null
+    response = PatientBriefResponse(status="success", patient_brief=brief)
+    assert set(response.model_dump()["patient_brief"]) == {"patient_info", "allergies"}
+
+
+def test_get_patient_brief_fields_projection():
+    """Test selecting profile sections, and rejecting unknown ones"""
+    result = asyncio.run(get_patient_brief("12345", fields="patient_info,medications"))
+    assert result["status"] == "success"
+    assert set(result["patient_brief"]) == {"patient_info", "medications"}
+
+    result = asyncio.run(get_patient_brief("12345", fields="patient_info,notes"))
+    assert result["status"] == "error"
+
+
 def test_get_patient_brief_not_found():
     """Test getting brief for non-existent patient"""
-    result = get_patient_brief("99999")
+    result = asyncio.run(get_patient_brief("99999"))
 
     assert result["status"] == "error"
     assert "not found" in result["message"].lower()
@@ -101,8 +134,10 @@ def test_get_patient_brief_not_found():
 
 def test_add_consultation_notes_by_id():
     """Test adding consultation notes by patient ID"""
-    result = add_consultation_notes(
-        "12346", "Dr. Test", "Test consultation notes for automated testing"
+    result = asyncio.run(
+        add_consultation_notes(
+            "12346", "Dr. Test", "Test consultation notes for automated testing"
+        )
     )
 
     assert result["status"] == "success"
@@ -111,8 +146,10 @@ def test_add_consultation_notes_by_id():
 
 def test_add_consultation_notes_by_name():
     """Test adding consultation notes by patient name"""
-    result = add_consultation_notes(
-        "Cian Murphy", "Dr. Test", "Another test consultation note"
+    result = asyncio.run(
+        add_consultation_notes(
+            "Cian Murphy", "Dr. Test", "Another test consultation note"
+        )
     )
 
     assert result["status"] == "success"
@@ -121,7 +158,9 @@ def test_add_consultation_notes_by_name():
 
 def test_add_consultation_notes_patient_not_found():
     """Test adding notes for non-existent patient"""
-    result = add_consultation_notes("99999", "Dr. Test", "This should fail")
+    result = asyncio.run(
+        add_consultation_notes("99999", "Dr. Test", "This should fail")
+    )
 
     assert result["status"] == "error"
     assert "not found" in result["message"].lower()
@@ -129,7 +168,7 @@ def test_add_consultation_notes_patient_not_found():
 
 def test_list_recent_patients_tool():
     """Test the list recent patients tool function"""
-    result = list_recent_patients()
+    result = asyncio.run(list_recent_patients())
 
     assert result["status"] == "success"
     assert "recent_patients" in result
@@ -151,13 +190,15 @@ def test_all_patients_have_required_fields():
 def test_consultation_notes_persist():
     """Test that added consultation notes are retrievable"""
     # Add a test note
-    add_result = add_consultation_notes(
-        "12345", "Dr. Test Persistence", "Testing note persistence"
+    add_result = asyncio.run(
+        add_consultation_notes(
+            "12345", "Dr. Test Persistence", "Testing note persistence"
+        )
     )
     assert add_result["status"] == "success"
 
     # Retrieve and verify the note exists
-    brief_result = get_patient_brief("12345")
+    brief_result = asyncio.run(get_patient_brief("12345"))
     assert brief_result["status"] == "success"
 
     consultations = brief_result["patient_brief"]["consultations"]
@@ -166,6 +207,16 @@ def test_consultation_notes_persist():
     assert "Testing note persistence" in test_notes[0]["notes"]
 
 
+def test_consultation_updates_last_seen():
+    """Test that a new consultation moves the patient to the top of recent patients"""
+    assert patient_memory.add_consultation_note(12347, "Dr. Test", "Last seen check")
+
+    today = patient_memory.get_patient_profile(12347)["patient_info"]["last_seen"]
+    recent = patient_memory.list_recent_patients(limit=3)
+    assert recent[0]["last_seen"] == today
+    assert 12347 in [p["patient_id"] for p in recent if p["last_seen"] == today]
+
+
 def test_add_medication():
     """Test adding a medication to patient memory"""
     result = patient_memory.add_medication(12345, "Aspirin 100mg daily")
@@ -210,16 +261,81 @@ def test_update_patient_memory_flexible():
     from medical_tools import update_patient_memory
 
     # Test medication update
-    result = update_patient_memory("12346", "medication", "Ibuprofen 400mg as needed")
+    result = asyncio.run(
+        update_patient_memory("12346", "medication", "Ibuprofen 400mg as needed")
+    )
     assert result["status"] == "success"
     assert "medication" in result["message"]
 
     # Test allergy update with severity
-    result = update_patient_memory("12346", "allergy", "Shellfish", "severe reaction")
+    result = asyncio.run(
+        update_patient_memory("12346", "allergy", "Shellfish", "severe reaction")
+    )
     assert result["status"] == "success"
     assert "allergy" in result["message"]
 
     # Test preference update
-    result = update_patient_memory("12346", "preference", "Prefers video consultations")
+    result = asyncio.run(
+        update_patient_memory("12346", "preference", "Prefers video consultations")
+    )
     assert result["status"] == "success"
     assert "preference" in result["message"]
+
+
+def test_update_patient_memory_patient_not_found():
+    """Test that memory updates validate numeric patient IDs"""
+    from medical_tools import update_patient_memory
+
+    result = asyncio.run(update_patient_memory("99999", "medication", "Aspirin"))
+    assert result["status"] == "error"
+    assert "not found" in result["message"].lower()
+
+
+def test_record_patient_visit_batch():
+    """Test recording several updates from one visit in one call"""
+    from medical_tools import record_patient_visit
+
+    result = asyncio.run(
+        record_patient_visit(
+            "12347",
+            [
+                {"memory_type": "consultation", "content": "Batch visit note"},
+                {"memory_type": "medication", "content": "Vitamin D 1000IU daily"},
+                {"memory_type": "medication", "content": "Iron 14mg daily"},
+                {
+                    "memory_type": "allergy",
+                    "content": "Latex",
+                    "additional_details": "mild",
+                },
+                {"memory_type": "horoscope", "content": "Leo"},
+            ],
+        )
+    )
+
+    assert result["status"] == "partial"
+    assert [r["success"] for r in result["results"]] == [True, True, True, True, False]
+
+    profile = patient_memory.get_patient_profile(12347)
+    assert any(c["notes"] == "Batch visit note" for c in profile["consultations"])
+    assert any(a["allergen"] == "Latex" for a in profile["allergies"])
+
+
+def test_templated_consultation_prep():
+    """Test that the brief is rendered from the profile without the AI model"""
+    from medical_tools import build_patient_brief
+
+    result = asyncio.run(build_patient_brief("Brigid O'Sullivan", consultation_prep=True))
+
+    assert result["status"] == "success"
+    brief = result["brief"]
+    assert brief["patient"]["patient_id"] == 12345
+    assert brief["allergies"][0]["allergen"] == "NSAIDs"
+    assert {m["medication"] for m in brief["active_medications"]} >= {
+        "Metformin 500mg twice daily"
+    }
+    assert brief["recent_visits"][0]["date"] >= brief["recent_visits"][-1]["date"]
+    assert brief["suggested_questions"]
+    assert "**NSAIDs**" in result["text"]
+
+    missing = asyncio.run(build_patient_brief("99999"))
+    assert missing["status"] == "error"
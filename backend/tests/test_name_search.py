@@ -0,0 +1,59 @@
+"""
+Tests for the in-process patient name index
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_search import NameIndex
+
+
+def build_index():
+    index = NameIndex()
+    index.rebuild([
+        (1, "Sean O'Sullivan"),
+        (2, "José García"),
+        (3, "Maria Garcia"),
+        (4, "John Smith"),
+        (5, "Jane Smithson"),
+    ])
+    return index
+
+
+def ids(result):
+    return [r["patient_id"] for r in result["results"]]
+
+
+def test_exact_match_ranks_first():
+    """Test that an exact full name outranks partial matches"""
+    result = build_index().search("John Smith")
+    assert ids(result)[0] == 4
+    assert result["results"][0]["score"] == 1.0
+
+
+def test_punctuation_and_accents_are_folded():
+    """Test apostrophes, spacing and accents do not affect matching"""
+    index = build_index()
+    assert ids(index.search("O Sullivan"))[0] == 1
+    assert ids(index.search("osullivan"))[0] == 1
+    assert ids(index.search("jose garcia"))[0] == 2
+
+
+def test_typo_tolerance():
+    """Test that a misspelt name still finds the patient"""
+    assert ids(build_index().search("Jhon Smith"))[0] == 4
+    assert ids(build_index().search("Smiht"))[0] == 4
+
+
+def test_pagination_and_removal():
+    """Test limit/offset paging and removing a patient from the index"""
+    index = build_index()
+    first = index.search("smith", limit=1)
+    second = index.search("smith", limit=1, offset=1)
+    assert first["total"] == second["total"] == 2
+    assert set(ids(first) + ids(second)) == {4, 5}
+
+    index.remove(5)
+    assert ids(index.search("smith")) == [4]
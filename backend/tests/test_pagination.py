@@ -0,0 +1,92 @@
+"""
+Tests for keyset pagination of patient records and patient lists
+"""
+
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_store import InMemoryPatientMemory
+from records import consultation_record
+from datetime import datetime, timedelta
+
+
+def build_store(patients=5, visits=7):
+    store = InMemoryPatientMemory(profile_consultations=3)
+    start = datetime(2024, 1, 1, 9, 0)
+    documents = []
+    for patient_id in range(1, patients + 1):
+        documents.append(
+            ("patients", {"patient_id": patient_id, "name": f"P {patient_id}"})
+        )
+        # Patient 1 is never seen; the others have `visits` visits each,
+        # two per day so dates tie and the ID breaks the tie
+        for visit in range(visits if patient_id > 1 else 0):
+            now = start + timedelta(days=visit // 2 + patient_id, hours=visit)
+            documents.append(
+                (
+                    "consultations",
+                    consultation_record(patient_id, "Dr. Page", f"v{visit}", now),
+                )
+            )
+    store.load(documents)
+    return store
+
+
+def walk(fetch, key):
+    """Follow next_cursor until the last page; returns every item"""
+    items, cursor = [], None
+    while True:
+        result = fetch(cursor)
+        items.extend(result[key])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_profile_embeds_recent_consultations_with_cursor():
+    """Test that profiles carry the newest N consultations and a cursor for the rest"""
+    store = build_store()
+    profile = store.get_patient_profile(2)
+
+    assert len(profile["consultations"]) == 3
+    assert profile["consultations_next_cursor"] is not None
+
+    rest = walk(
+        lambda cursor: store.get_patient_records(
+            2,
+            "consultations",
+            limit=2,
+            cursor=cursor or profile["consultations_next_cursor"],
+        ),
+        "items",
+    )
+    ids = [c["consultation_id"] for c in profile["consultations"] + rest]
+    assert len(ids) == len(set(ids)) == 7
+    dates = [c["date"] for c in profile["consultations"] + rest]
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_patient_list_pages_cover_every_patient_once():
+    """Test that paging the patient list visits each patient once, never-seen last"""
+    store = build_store()
+    patients = walk(
+        lambda cursor: store.list_patients_page(limit=2, cursor=cursor), "patients"
+    )
+
+    assert [p["patient_id"] for p in patients] == [5, 4, 3, 2, 1]
+    assert patients[-1]["last_seen"] is None
+
+
+def test_invalid_cursor_is_rejected():
+    """Test that malformed or mismatched cursors raise ValueError"""
+    store = build_store()
+    records_cursor = store.get_patient_profile(2)["consultations_next_cursor"]
+
+    with pytest.raises(ValueError):
+        store.get_patient_records(2, "consultations", cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        store.list_patients_page(cursor=records_cursor)
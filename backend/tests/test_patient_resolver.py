@@ -0,0 +1,61 @@
+"""
+Tests for the cached patient name/ID resolver
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_memory import AsyncPatientMemory
+from medical_tools import PatientResolver
+from memory_store import InMemoryPatientMemory
+
+
+def build_resolver():
+    store = InMemoryPatientMemory()
+    store.load([
+        ("patients", {"patient_id": 1, "name": "Aoife Kelly"}),
+        ("patients", {"patient_id": 2, "name": "Aoife Kelly"}),
+        ("patients", {"patient_id": 3, "name": "Niamh Byrne"}),
+    ])
+    return store, PatientResolver(AsyncPatientMemory(memory=store, max_workers=1))
+
+
+def test_repeat_name_lookups_hit_cache():
+    """Test that resolving the same name twice searches only once"""
+    store, resolver = build_resolver()
+    assert asyncio.run(resolver.resolve("Niamh Byrne")) == (3, None)
+    assert asyncio.run(resolver.resolve("niamh  byrne")) == (3, None)
+
+    stats = resolver.cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_ambiguous_name_returns_candidates():
+    """Test that equally good matches are reported rather than guessed"""
+    store, resolver = build_resolver()
+    patient_id, error = asyncio.run(resolver.resolve("Aoife Kelly"))
+
+    assert patient_id is None
+    assert error["status"] == "error"
+    assert {c["patient_id"] for c in error["candidates"]} == {1, 2}
+
+
+def test_rename_invalidates_cached_names():
+    """Test that renaming a patient makes cached resolutions stale"""
+    store, resolver = build_resolver()
+    assert asyncio.run(resolver.resolve("Aoife Kelly"))[0] is None
+
+    store.load([("patients", {"patient_id": 2, "name": "Aoife Kelly-Walsh"})])
+    assert asyncio.run(resolver.resolve("Aoife Kelly")) == (1, None)
+    assert asyncio.run(resolver.resolve("Aoife Kelly-Walsh")) == (2, None)
+
+
+def test_unknown_patient():
+    """Test that unknown names and IDs are reported as not found"""
+    store, resolver = build_resolver()
+    assert asyncio.run(resolver.resolve("Nobody Here"))[1]["status"] == "error"
+    assert asyncio.run(resolver.resolve("999"))[1]["status"] == "error"
@@ -0,0 +1,117 @@
+"""
+Tests for the Couchbase store's profile cache, with a stub cluster in place
+of Couchbase
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import patient_memory
+
+
+class StubCollection:
+    def upsert(self, key, doc):
+        pass
+
+    def mutate_in(self, key, specs):
+        pass
+
+
+class StubScope:
+    name = "medicai"
+
+    def collection(self, name):
+        return StubCollection()
+
+
+class StubCluster:
+    """Answers profile queries with a fixed profile, running a hook first"""
+
+    name = "bucket"
+
+    def __init__(self, *args, **kwargs):
+        self.notes = ["first visit"]
+        self.during_query = None
+
+    def bucket(self, name):
+        return self
+
+    def scope(self, name):
+        return StubScope()
+
+    def query(self, statement, *args):
+        notes = list(self.notes)
+        if self.during_query:
+            hook, self.during_query = self.during_query, None
+            hook()
+        return [
+            {
+                "patient_info": {"patient_id": 1, "name": "Test Patient"},
+                "consultations": [
+                    {"consultation_id": f"1_{n}", "date": "2024-01-01", "notes": note}
+                    for n, note in enumerate(notes)
+                ],
+            }
+        ]
+
+
+def make_store(monkeypatch):
+    monkeypatch.setattr(patient_memory, "Cluster", StubCluster)
+    return patient_memory.PatientMemory("couchbase://stub", "user", "pw", "bucket")
+
+
+def test_read_overlapping_a_write_is_not_cached(monkeypatch):
+    """Test that a profile read before a write cannot repopulate the cache"""
+    store = make_store(monkeypatch)
+
+    def write():
+        store.cluster.notes.append("second visit")
+        store.add_consultation_note(1, "Dr. Test", "second visit")
+
+    store.cluster.during_query = write
+    stale = store.get_patient_profile(1)
+    assert len(stale["consultations"]) == 1
+
+    fresh = store.get_patient_profile(1)
+    assert len(fresh["consultations"]) == 2
+
+
+def test_cached_profile_is_returned_as_a_copy(monkeypatch):
+    """Test that changing a returned profile does not change the cache"""
+    store = make_store(monkeypatch)
+    store.get_patient_profile(1)["consultations"].clear()
+    cached = store.get_patient_profile(1)
+    cached["patient_info"]["name"] = "Changed"
+
+    again = store.get_patient_profile(1)
+    assert len(again["consultations"]) == 1
+    assert again["patient_info"]["name"] == "Test Patient"
+    assert store.cache_stats()["profiles"]["hits"] == 2
+
+
+class StubMutationResult(list):
+    """Query result of a mutation run without query metrics"""
+
+    def metadata(self):
+        return self
+
+    def metrics(self):
+        return None
+
+
+def test_backfill_without_metrics_clears_the_cache(monkeypatch):
+    """Test that backfilling asks for metrics and copes with a response without them"""
+    store = make_store(monkeypatch)
+    store.get_patient_profile(1)
+    options = []
+
+    def query(statement, *args):
+        options.extend(args)
+        return StubMutationResult()
+
+    monkeypatch.setattr(store.cluster, "query", query)
+    assert store.backfill_last_seen() == 0
+    assert options == [patient_memory.QueryOptions(metrics=True)]
+    assert store.cache_stats()["profiles"]["size"] == 0
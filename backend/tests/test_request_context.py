@@ -0,0 +1,97 @@
+"""
+Tests that concurrent agent requests keep their own doctor and session
+"""
+
+import asyncio
+import random
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events import Event
+from google.genai import types
+
+import medical_agent
+import medical_tools
+from async_memory import AsyncPatientMemory
+from memory_store import InMemoryPatientMemory
+from request_context import current_doctor_id, current_session_id
+
+CHATS = 300
+
+
+class ToolCallingRunner:
+    """
+    Stands in for Runner.run_async: records the message as a consultation
+    note through the real tool, run in its own task as the ADK does, and
+    answers with the doctor and session the tool context reported
+    """
+
+    def __init__(self):
+        self.rng = random.Random(25)
+
+    async def run_async(self, user_id, session_id, new_message, **kwargs):
+        await asyncio.sleep(self.rng.random() / 100)
+        note = new_message.parts[0].text
+        result = await asyncio.create_task(
+            medical_tools.update_patient_memory("1", "consultation", note)
+        )
+        await asyncio.sleep(self.rng.random() / 100)
+        answer = f"{current_doctor_id()}|{current_session_id()}|{result['status']}"
+        yield Event(
+            author="medical_assistant",
+            content=types.Content(role="model", parts=[types.Part(text=answer)]),
+        )
+
+
+def use_store(monkeypatch, store):
+    """Point the agent's tools at a private store"""
+    memory = AsyncPatientMemory(memory=store, max_workers=4)
+    monkeypatch.setattr(medical_tools, "async_patient_memory", memory)
+    monkeypatch.setattr(
+        medical_tools, "patient_resolver", medical_tools.PatientResolver(memory)
+    )
+
+
+def test_concurrent_chats_keep_their_own_context(monkeypatch):
+    """Test tool context isolation under hundreds of simultaneous chats"""
+    store = InMemoryPatientMemory()
+    store.load([("patients", {"patient_id": 1, "name": "Test Patient"})])
+    use_store(monkeypatch, store)
+    monkeypatch.setattr(medical_agent, "get_runner", lambda: ToolCallingRunner())
+
+    async def chat(n):
+        return await medical_agent.call_medical_agent(
+            f"Isolation check {n}", doctor_id=f"dr_{n}", session_id=f"session_{n}"
+        )
+
+    async def stream(n):
+        events = [
+            event
+            async for event in medical_agent.stream_medical_agent(
+                f"Isolation check {n}", doctor_id=f"dr_{n}", session_id=f"session_{n}"
+            )
+        ]
+        return events[-1]["response"]
+
+    async def run():
+        calls = [chat(n) if n % 2 else stream(n) for n in range(CHATS)]
+        return await asyncio.gather(*calls)
+
+    responses = asyncio.run(run())
+
+    assert responses == [f"dr_{n}|session_{n}|success" for n in range(CHATS)]
+    assert current_doctor_id() is None
+
+
+def test_notes_naming_no_doctor_are_credited_to_dr_unknown(monkeypatch):
+    """Test that the requesting doctor ID is not written into notes"""
+    store = InMemoryPatientMemory()
+    store.load([("patients", {"patient_id": 1, "name": "Test Patient"})])
+    use_store(monkeypatch, store)
+    monkeypatch.setattr(medical_agent, "get_runner", lambda: ToolCallingRunner())
+
+    asyncio.run(medical_agent.call_medical_agent("CLI note", "Jones", "s1"))
+    notes = store.get_patient_records(1, "consultations")["items"]
+    assert [note["doctor"] for note in notes] == ["Dr. Unknown"]
@@ -0,0 +1,126 @@
+"""
+Tests for per-doctor, per-patient agent sessions and history caps
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events import Event
+from google.genai import types
+
+from session_service import CompactingInMemorySessionService, SUMMARY_PREFIX
+from sessions import SessionRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def build_registry(**kwargs):
+    service = CompactingInMemorySessionService()
+    clock = FakeClock()
+    registry = SessionRegistry("test_app", lambda: service, clock=clock, **kwargs)
+    return registry, service, clock
+
+
+def live_sessions(service, user_id):
+    return set(service.sessions.get("test_app", {}).get(user_id, {}))
+
+
+def test_sessions_are_per_doctor_and_patient():
+    """Test that each doctor/patient pair gets its own reusable session"""
+    registry, service, clock = build_registry()
+
+    async def run():
+        a = await registry.session_for("dr_a", 12345)
+        again = await registry.session_for("dr_a", "12345")
+        other_patient = await registry.session_for("dr_a", 12346)
+        other_doctor = await registry.session_for("dr_b", 12345)
+        return a, again, other_patient, other_doctor
+
+    a, again, other_patient, other_doctor = asyncio.run(run())
+    assert a == again
+    assert len({a, other_patient, other_doctor}) == 3
+    assert registry.stats()["sessions"] == 3
+
+
+def test_idle_and_excess_sessions_are_deleted():
+    """Test idle eviction and the max_sessions cap"""
+    registry, service, clock = build_registry(idle_timeout=60, max_sessions=2)
+
+    async def run():
+        idle = await registry.session_for("dr_a", 1)
+        clock.now = 120
+        first = await registry.session_for("dr_a", 2)
+        await registry.session_for("dr_a", 3)
+        await registry.session_for("dr_a", 4)
+        return idle, first
+
+    idle, first = asyncio.run(run())
+    assert idle not in live_sessions(service, "dr_a")
+    assert first not in live_sessions(service, "dr_a")
+    assert len(live_sessions(service, "dr_a")) == 2
+    assert registry.stats()["evictions"] == 2
+
+
+def message(author, text):
+    role = "user" if author == "user" else "model"
+    return Event(
+        author=author,
+        content=types.Content(role=role, parts=[types.Part(text=text)]),
+    )
+
+
+def run_conversation(service, turns, answer_size=400):
+    async def run():
+        session = await service.create_session(app_name="test_app", user_id="dr_a")
+        for turn in range(turns):
+            await service.append_event(session, message("user", f"question {turn}"))
+            await service.append_event(
+                session, message("assistant", f"answer {turn} " + "x" * answer_size)
+            )
+        stored = await service.get_session(
+            app_name="test_app", user_id="dr_a", session_id=session.id
+        )
+        return session.id, stored.events
+
+    return asyncio.run(run())
+
+
+def test_old_turns_are_compacted_into_a_summary():
+    """Test that over budget, old turns become a summary and recent ones stay"""
+    service = CompactingInMemorySessionService(
+        token_budget=600, keep_turns=2, summary_budget=200
+    )
+    session_id, events = run_conversation(service, turns=10)
+
+    first = events[0].content.parts
+    assert first[0].text.startswith(SUMMARY_PREFIX)
+    assert "Doctor: question" in first[0].text
+    assert events[-2].content.parts[0].text == "question 9"
+    # Turns still start with the doctor's message
+    assert events[0].author == "user"
+    assert first[1].text.startswith("question")
+
+    stats = service.session_stats("test_app", "dr_a", session_id)
+    assert stats["compactions"] >= 1
+    assert stats["tokens"] <= 600
+
+
+def test_token_count_stays_flat_in_long_sessions():
+    """Test that history size does not grow with the number of turns"""
+    service = CompactingInMemorySessionService(token_budget=800, keep_turns=2)
+    short_id, _ = run_conversation(service, turns=20)
+    long_id, _ = run_conversation(service, turns=200)
+
+    short = service.session_stats("test_app", "dr_a", short_id)
+    long = service.session_stats("test_app", "dr_a", long_id)
+    assert long["tokens"] <= 800
+    assert long["events"] <= short["events"] + 2
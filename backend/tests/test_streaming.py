@@ -0,0 +1,97 @@
+"""
+Tests for streaming agent responses, using a scripted runner in place of Gemini
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events import Event
+from google.genai import types
+
+import medical_agent
+
+
+def text_event(text, partial):
+    return Event(
+        author="medical_assistant",
+        partial=partial,
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+    )
+
+
+class ScriptedRunner:
+    """Replays a fixed event sequence like Runner.run_async in SSE mode"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def run_async(self, **kwargs):
+        assert kwargs["run_config"].streaming_mode.value == "sse"
+        for event in self.events:
+            yield event
+
+
+def collect(monkeypatch, events):
+    monkeypatch.setattr(medical_agent, "get_runner", lambda: ScriptedRunner(events))
+
+    async def run():
+        return [
+            event
+            async for event in medical_agent.stream_medical_agent("hi", "doc", "s1")
+        ]
+
+    return asyncio.run(run())
+
+
+def test_stream_yields_partials_and_tool_progress(monkeypatch):
+    """Test partial text is streamed once and tool calls are reported"""
+    call = types.Part(
+        function_call=types.FunctionCall(
+            name="get_patient_brief", args={"patient_identifier": "12345"}
+        )
+    )
+    result = types.Part(
+        function_response=types.FunctionResponse(
+            name="get_patient_brief", response={"status": "success"}
+        )
+    )
+    events = collect(
+        monkeypatch,
+        [
+            Event(
+                author="medical_assistant",
+                content=types.Content(role="model", parts=[call]),
+            ),
+            Event(
+                author="medical_assistant",
+                content=types.Content(role="user", parts=[result]),
+            ),
+            text_event("Brigid is ", partial=True),
+            text_event("72.", partial=True),
+            text_event("Brigid is 72.", partial=False),
+        ],
+    )
+
+    assert [e["type"] for e in events] == [
+        "tool_call",
+        "tool_result",
+        "text",
+        "text",
+        "done",
+    ]
+    assert events[0]["args"] == {"patient_identifier": "12345"}
+    assert events[1]["status"] == "success"
+    assert events[-1]["response"] == "Brigid is 72."
+
+
+def test_stream_without_partials_yields_final_text(monkeypatch):
+    """Test a response that arrives in one piece is still emitted as text"""
+    events = collect(monkeypatch, [text_event("Done.", partial=False)])
+
+    assert events == [
+        {"type": "text", "text": "Done."},
+        {"type": "done", "response": "Done."},
+    ]
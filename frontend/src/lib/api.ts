@@ -69,6 +69,7 @@ export interface APIResponse {
 export interface ChatResponse {
   response: string;
   timestamp: string;
+  brief?: Record<string, any>;
 }
 
 export interface PatientBriefResponse {